@@ -8,11 +8,52 @@ Import the package::
 
 __version__ = "0.15.0"  # denote a pre-release for 0.1.0 with 0.1a1
 
-from . import db, nox
-from ._docs import (
-    move_built_docs_to_docs_slash_project_slug,
-    move_built_docs_to_slash_project_slug,
-)
-from ._docs_artifacts import convert_executable_md_files, upload_docs_artifact
-from ._env import get_package_name, get_schema_handle
-from ._run_notebooks import run_notebooks
+import sys
+from typing import TYPE_CHECKING
+
+# public symbols are imported on first access to keep the CLI startup fast,
+# e.g., `nox` and `yaml` are only needed by some commands
+_LAZY_ATTRIBUTES = {
+    "move_built_docs_to_docs_slash_project_slug": "._docs",
+    "move_built_docs_to_slash_project_slug": "._docs",
+    "convert_executable_md_files": "._docs_artifacts",
+    "upload_docs_artifact": "._docs_artifacts",
+    "ProjectConfig": "._env",
+    "get_package_name": "._env",
+    "get_schema_handle": "._env",
+    "run_notebooks": "._run_notebooks",
+}
+_LAZY_SUBMODULES = {"db", "nox"}
+
+if TYPE_CHECKING:
+    from . import db, nox
+    from ._docs import (
+        move_built_docs_to_docs_slash_project_slug,
+        move_built_docs_to_slash_project_slug,
+    )
+    from ._docs_artifacts import convert_executable_md_files, upload_docs_artifact
+    from ._env import ProjectConfig, get_package_name, get_schema_handle
+    from ._run_notebooks import run_notebooks
+
+
+def __getattr__(name: str):
+    import importlib
+
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(_LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted([*globals(), *_LAZY_ATTRIBUTES, *_LAZY_SUBMODULES])
+
+
+if "nox" in sys.modules:
+    # in a noxfile, keep the side effects that importing laminci always had: no
+    # virtualenvs by default and the quieter session decorator
+    from . import nox
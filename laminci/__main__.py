@@ -7,15 +7,29 @@ import os
 import re
 import shutil
 import subprocess
+import sys
 import tempfile
-import zipfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from subprocess import PIPE, run
+from subprocess import run
+from typing import TYPE_CHECKING
+
+from ._cache import (
+    clone_tree,
+    evict,
+    hash_bytes,
+    hash_file,
+    publish_dir,
+    resolve_cache_dir,
+    touch,
+)
+from ._timing import timed
 
-import tomllib
-from packaging.version import Version, parse
+if TYPE_CHECKING:
+    from packaging.version import Version
 
-from ._env import get_package_name
+# commands import their dependencies lazily to keep the startup fast
 
 parser = argparse.ArgumentParser("laminci")
 subparsers = parser.add_subparsers(dest="command")
@@ -35,20 +49,52 @@ aa(
     default=False,
     action="store_true",
     help=(
-        "For lamindb dual-release (core + full): build wheels and run import "
-        "smoke checks in a temporary venv before publishing (slow)."
+        "For lamindb dual-release (core + full): run import smoke checks of the "
+        "built wheels in a temporary venv before publishing them."
     ),
 )
-subparsers.add_parser(
+doc_changes = subparsers.add_parser(
     "doc-changes",
     help="Write latest changes",
 )
+aa = doc_changes.add_argument
+aa("--numbers", type=int, nargs="+", default=None, help="Add entries for these PRs")
+aa(
+    "--since-last-entry",
+    default=False,
+    action="store_true",
+    help="Add entries for all PRs merged since the last changelog entry",
+)
 upload_docs = subparsers.add_parser(
     "upload-docs",
 )
 aa = upload_docs.add_argument
 aa("--dir", default="./docs", help="Docs dir link")
 aa("--in-pr", default=False, action="store_true", help="Also uplod in PR")
+aa(
+    "--incremental",
+    default=False,
+    action="store_true",
+    help="Only upload changed files, based on the manifest of the previous upload",
+)
+aa("--chunk-size", type=int, default=8, help="Multipart chunk size in MiB")
+aa("--concurrency", type=int, default=10, help="Number of concurrent part uploads")
+aa("--max-attempts", type=int, default=5, help="Attempts per request, with backoff")
+run_notebooks = subparsers.add_parser(
+    "run-notebooks",
+    help="Execute notebooks",
+)
+aa = run_notebooks.add_argument
+aa("path", help="Notebook or folder with notebooks")
+aa("--workers", type=int, default=1, help="Number of worker processes")
+aa(
+    "--independent",
+    default=False,
+    action="store_true",
+    help="Notebooks don't depend on each other and can run in parallel",
+)
+aa("--cache-dir", default=None, help="Execution cache, default: $LAMINCI_CACHE_DIR")
+aa("--force", default=False, action="store_true", help="Ignore the execution cache")
 
 
 def update_readme_version(file_path, new_version):
@@ -66,17 +112,9 @@ def update_readme_version(file_path, new_version):
         file.write(updated_content)
 
 
-def get_last_version_from_tags():
-    proc = run(["git", "tag"], text=True, stdout=PIPE)
-    tags = proc.stdout.splitlines()
-    newest = "0.0.0"
-    for tag in tags:
-        if parse(tag) > parse(newest):
-            newest = tag
-    return newest
-
-
 def validate_version(version_str: str):
+    from packaging.version import parse
+
     version = parse(version_str)
     if version.is_prerelease:
         if not len(version.release) == 2:
@@ -98,72 +136,32 @@ def publish_github_release(
     body: str = "",
     draft: bool = False,
     generate_release_notes: bool = True,
-    cwd: str | None | Path = None,
 ):
-    version = parse(version)
+    from packaging.version import parse
+
+    from ._github import GitHubError, get_github_client
 
+    version = parse(version)
+    print(f"\nINFO: Creating GitHub release {version} of {repo_name}")
     try:
-        cwd = Path.cwd() if cwd is None else Path(cwd)
-        # account for repo_name sometimes being a package
-        repo_name_standardized = repo_name.split("/")[1]
-        if not repo_name_standardized == cwd.name:
-            raise ValueError(f"Don't match: {repo_name_standardized} != {cwd.name}")
-        subprocess.run(["gh", "--version"], check=True, stdout=subprocess.PIPE, cwd=cwd)
-        try:
-            command = [
-                "gh",
-                "release",
-                "create",
-                f"{version}",
-                "--title",
-                release_name,
-                "--notes",
-                body,
-            ]
-            if generate_release_notes:
-                command.append("--generate-notes")
-            if version.is_prerelease:
-                command.append("--prerelease")
-
-            print(f"\nrun: {' '.join(command)}")
-            subprocess.run(command, check=True, stdout=subprocess.PIPE, cwd=cwd)
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            if input("GitHub release error. Continue? ") != "y":
-                raise e
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        try:
-            from github import Github, GithubException
-
-            token = (
-                os.getenv("GITHUB_TOKEN")
-                if os.getenv("GITHUB_TOKEN")
-                else input("Github token:")
-            )
-            g = Github(token)
-
-            try:
-                repo = g.get_repo(repo_name)
-                repo.create_git_release(
-                    tag=str(version),
-                    name=release_name,
-                    message=body,
-                    draft=draft,
-                    prerelease=version.is_prerelease,
-                    generate_release_notes=generate_release_notes,
-                )
-            except GithubException as e:
-                raise SystemExit(
-                    f"Error creating GitHub release using `PyGithub`: {e}"
-                ) from None
-        except ImportError:
-            raise SystemExit(
-                "Neither the Github CLI ('gh') nor PyGithub were accessible.\n"
-                "Please install one of the two."
-            ) from None
+        release = get_github_client().create_release(
+            repo_name,
+            tag=str(version),
+            name=release_name,
+            body=body,
+            draft=draft,
+            prerelease=version.is_prerelease,
+            generate_release_notes=generate_release_notes,
+        )
+    except GitHubError as e:
+        raise SystemExit(f"Error creating GitHub release of {repo_name}: {e}") from None
+    print(f"INFO: Created {release['html_url']}")
 
 
 def check_only_version_bump_staged(
-    package_name: str, additional_staged_files: list[str] | None = None
+    package_name: str,
+    additional_staged_files: list[str] | None = None,
+    staged_files: list[str] | None = None,
 ):
     # Check that the expected files are staged and no others
     init_file_path = f"{package_name}/__init__.py"
@@ -172,13 +170,14 @@ def check_only_version_bump_staged(
         expected_files.update(additional_staged_files)
 
     # Get list of staged files
-    import subprocess
-
-    staged_files = (
-        subprocess.check_output(["git", "diff", "--name-only", "--cached"], text=True)
-        .strip()
-        .split("\n")
-    )
+    if staged_files is None:
+        staged_files = (
+            subprocess.check_output(
+                ["git", "diff", "--name-only", "--cached"], text=True
+            )
+            .strip()
+            .split("\n")
+        )
 
     # Check if staged_files is empty (no staged files)
     if not staged_files or staged_files == [""]:
@@ -202,30 +201,36 @@ def check_only_version_bump_staged(
         )
 
 
-def _run_checked(command: list[str], cwd: str | None = None):
+def _run_checked(
+    command: list[str], cwd: str | None = None, env: dict[str, str] | None = None
+):
     print(f"\nrun: {' '.join(command)}")
-    subprocess.run(command, check=True, cwd=cwd)
+    subprocess.run(command, check=True, cwd=cwd, env=env)
 
 
-def _build_wheel_with_pyproject(pyproject_file: Path, dist_dir: Path) -> Path:
-    dist_dir.mkdir(parents=True, exist_ok=True)
-    _run_checked(["flit", "-f", str(pyproject_file), "build", "--format", "wheel"])
-    project_name = tomllib.loads(pyproject_file.read_text())["project"]["name"]
-    wheel_prefix = project_name.replace("-", "_")
-    source_wheels = sorted(
-        Path("dist").glob(f"{wheel_prefix}-*.whl"), key=lambda p: p.stat().st_mtime
-    )
-    if not source_wheels:
-        raise SystemExit(f"No wheel for {project_name} was produced in dist/")
-    built_wheel = source_wheels[-1]
-    target_wheel = dist_dir / built_wheel.name
-    shutil.copy2(built_wheel, target_wheel)
-    return target_wheel
+def _build_dists_with_pyproject(
+    pyproject_file: Path, dist_dir: Path, version: str
+) -> list[Path]:
+    """Build wheel and sdist, copy them to `dist_dir`."""
+    import tomllib
 
+    from ._wheels import sdist_filename, wheel_filename
 
-def _wheel_has_lamindb_package(wheel_path: Path) -> bool:
-    with zipfile.ZipFile(wheel_path, "r") as zf:
-        return any(name.startswith("lamindb/") for name in zf.namelist())
+    dist_dir.mkdir(parents=True, exist_ok=True)
+    _run_checked(["flit", "-f", str(pyproject_file), "build"])
+    project_name = tomllib.loads(pyproject_file.read_text())["project"]["name"]
+    artifacts = []
+    for filename in (
+        wheel_filename(project_name, version),
+        sdist_filename(project_name, version),
+    ):
+        built = Path("dist") / filename
+        if not built.exists():
+            raise SystemExit(f"No {filename} for {project_name} was produced in dist/")
+        target = dist_dir / filename
+        shutil.copy2(built, target)
+        artifacts.append(target)
+    return artifacts
 
 
 def _assert_lamindb_dependency_pin(version: str):
@@ -240,89 +245,248 @@ def _assert_lamindb_dependency_pin(version: str):
         ) from None
 
 
-def run_lamindb_dual_smoke_checks(version: str):
-    # Pre-publish safety check for lamindb dual-distribution releases.
-    # We intentionally create an isolated venv and install dependencies to ensure
-    # the published wheels behave correctly across install/uninstall sequences.
+SMOKE_CHECK_DEPENDENCIES = [
+    "lamin_utils==0.16.4",
+    "lamin_cli==1.14.1",
+    "lamindb_setup[aws]==1.22.0",
+    "pyyaml",
+    "typing_extensions!=4.6.0",
+    "python-dateutil",
+    "scipy<1.17.0",
+    "fsspec",
+    "graphviz",
+    "psycopg2-binary",
+]
+
+
+def _install_smoke_check_dependencies(venv_dir: Path, relocatable: bool = False) -> str:
+    command = ["uv", "venv", "--python", sys.executable, str(venv_dir)]
+    if relocatable:
+        command.append("--relocatable")
+    _run_checked(command)
+    python = str(venv_dir / "bin" / "python")
+    print(
+        "INFO: Installing core runtime dependencies into temp venv "
+        "(expected and required for the smoke check)."
+    )
+    _run_checked(
+        ["uv", "pip", "install", "--python", python, *SMOKE_CHECK_DEPENDENCIES]
+    )
+    return python
+
+
+def _create_smoke_check_env(venv_dir: Path, timings: dict[str, float]) -> str:
+    cache_dir = resolve_cache_dir(None, "smoke-envs")
+    if cache_dir is None:
+        with timed("create venv & install dependencies", timings):
+            print(f"INFO: Creating temporary smoke-test environment at {venv_dir}")
+            return _install_smoke_check_dependencies(venv_dir)
+    # base environments are keyed on the pinned dependencies and the interpreter
+    key = hash_bytes(
+        "\n".join(SMOKE_CHECK_DEPENDENCIES).encode(),
+        f"{sys.executable}\n{sys.version}".encode(),
+    )[:16]
+    base_dir = cache_dir / key
+    if base_dir.exists():
+        print(f"INFO: Reusing cached smoke-test base environment {base_dir}")
+        touch(base_dir)
+    else:
+        with timed("create cached base environment", timings):
+            print(f"INFO: Creating cached smoke-test base environment {base_dir}")
+            tmp_dir = cache_dir / f"{key}.tmp{os.getpid()}"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            _install_smoke_check_dependencies(tmp_dir, relocatable=True)
+            if not publish_dir(tmp_dir, base_dir):
+                print("INFO: A concurrent job created the base environment first")
+        for path in evict(cache_dir, max_bytes=5 * 1024**3, max_age=14 * 24 * 3600):
+            print(f"INFO: Evicted smoke-test environment {path}")
+    with timed("clone base environment", timings):
+        clone_tree(base_dir, venv_dir)
+    return str(venv_dir / "bin" / "python")
+
+
+def _build_dists_timed(
+    pyproject_file: Path, dist_dir: Path, version: str, timings: dict[str, float]
+) -> list[Path]:
+    with timed(f"build {pyproject_file}", timings):
+        return _build_dists_with_pyproject(pyproject_file, dist_dir, version)
+
+
+def _check_dual_pyprojects() -> tuple[Path, Path]:
     core_pyproject = Path("pyproject.toml")
     full_pyproject = Path("pyproject.full.toml")
     if not full_pyproject.exists():
         raise SystemExit("Missing pyproject.full.toml for lamindb dual release flow.")
+    return core_pyproject, full_pyproject
+
+
+def _hash_artifacts(artifacts: list[Path]) -> dict[Path, str]:
+    return {artifact: hash_file(artifact) for artifact in artifacts}
+
+
+# generous, a wheel that exceeds it most likely packages unintended files
+WHEEL_SIZE_BUDGET = 50 * 1024**2
+
+
+def _inspect_lamindb_dual_wheels(core_wheel: Path, full_wheel: Path, version: str):
+    from ._wheels import inspect_wheels
+
+    problems = inspect_wheels(
+        {
+            core_wheel: {"packages": ["lamindb"], "max_bytes": WHEEL_SIZE_BUDGET},
+            full_wheel: {
+                "forbidden_packages": ["lamindb"],
+                "requirements": [f"lamindb-core[full]=={version}"],
+                "max_bytes": WHEEL_SIZE_BUDGET,
+            },
+        }
+    )
+    messages = [
+        message for wheel_problems in problems.values() for message in wheel_problems
+    ]
+    if messages:
+        raise SystemExit("\n".join(messages))
+
+
+def build_lamindb_dual(
+    dist_dir: Path, version: str, timings: dict[str, float] | None = None
+) -> dict[Path, str]:
+    """Build and inspect wheels and sdists of lamindb-core and lamindb.
+
+    Returns the sha256 of every artifact, core artifacts first.
+    """
+    core_pyproject, full_pyproject = _check_dual_pyprojects()
+    timings = {} if timings is None else timings
+    # one after the other, both flit builds write to dist/ of the same tree
+    core_artifacts = _build_dists_timed(
+        core_pyproject, dist_dir / "core", version, timings
+    )
+    full_artifacts = _build_dists_timed(
+        full_pyproject, dist_dir / "full", version, timings
+    )
+    _inspect_lamindb_dual_wheels(core_artifacts[0], full_artifacts[0], version)
+    return _hash_artifacts(core_artifacts + full_artifacts)
+
+
+def run_lamindb_dual_smoke_checks(version: str, dist_dir: Path) -> dict[Path, str]:
+    """Build the lamindb dual-distribution artifacts and smoke check the wheels.
+
+    Returns the sha256 of the checked artifacts so that exactly these get published.
+    """
+    # Pre-publish safety check for lamindb dual-distribution releases.
+    # We intentionally create an isolated venv and install dependencies to ensure
+    # the published wheels behave correctly across install/uninstall sequences.
+    _check_dual_pyprojects()
 
     print(
         "\nINFO: Running lamindb dual-package smoke checks before publish.\n"
-        "INFO: This will build both wheels and install packages in a temporary venv."
+        "INFO: This will build both distributions and install packages in a "
+        "temporary venv."
     )
 
+    timings: dict[str, float] = {}
+    t_start = time.perf_counter()
     with tempfile.TemporaryDirectory() as tmpdir:
         tmpdir_path = Path(tmpdir)
-        print(f"INFO: Building wheels from {core_pyproject} and {full_pyproject}")
-        core_wheel = _build_wheel_with_pyproject(core_pyproject, tmpdir_path / "core")
-        full_wheel = _build_wheel_with_pyproject(full_pyproject, tmpdir_path / "full")
-
-        if "lamindb_core-" not in core_wheel.name:
-            raise SystemExit(f"Unexpected lamindb-core wheel name: {core_wheel.name}")
-        if "lamindb-" not in full_wheel.name:
-            raise SystemExit(f"Unexpected lamindb wheel name: {full_wheel.name}")
-        if not _wheel_has_lamindb_package(core_wheel):
-            raise SystemExit(f"{core_wheel.name} does not contain lamindb/ package")
-        if _wheel_has_lamindb_package(full_wheel):
-            raise SystemExit(
-                f"{full_wheel.name} unexpectedly contains lamindb/ package"
+        print(f"INFO: Building distributions into {dist_dir}")
+        # the builds and the dependency install are independent of each other
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            build_future = executor.submit(
+                build_lamindb_dual, dist_dir, version, timings
             )
+            env_future = executor.submit(
+                _create_smoke_check_env, tmpdir_path / "venv", timings
+            )
+            artifacts = build_future.result()
+            python = env_future.result()
+        wheels = [artifact for artifact in artifacts if artifact.suffix == ".whl"]
+        core_wheel, full_wheel = wheels
+
+        uv_pip = ["uv", "pip"]
+        with timed("core wheel check", timings):
+            _run_checked([*uv_pip, "install", "--python", python, str(core_wheel)])
+            _run_checked([python, "-c", "import lamindb"])
+            print("INFO: Core wheel import check passed.")
+        with timed("full wheel check", timings):
+            # pass the core wheel so that lamindb-core[full] resolves to it
+            _run_checked(
+                [
+                    *uv_pip,
+                    "install",
+                    "--python",
+                    python,
+                    str(core_wheel),
+                    str(full_wheel),
+                ]
+            )
+            _run_checked([python, "-c", "import lamindb"])
+            print("INFO: Full wheel import check passed.")
+        with timed("uninstall check", timings):
+            _run_checked([*uv_pip, "uninstall", "--python", python, "lamindb"])
+            _run_checked([python, "-c", "import lamindb"])
+            print("INFO: Uninstall check passed (lamindb-core still imports).")
+    print("INFO: Smoke check timings:")
+    for phase, seconds in timings.items():
+        print(f"INFO:   {phase}: {seconds:.1f}s")
+    print(f"INFO:   total: {time.perf_counter() - t_start:.1f}s")
+    return artifacts
+
+
+# twine reads other variables than flit, keep the credentials that CI sets for flit
+_FLIT_TO_TWINE_ENV = {
+    "FLIT_USERNAME": "TWINE_USERNAME",
+    "FLIT_PASSWORD": "TWINE_PASSWORD",
+    "FLIT_INDEX_URL": "TWINE_REPOSITORY_URL",
+}
+
+
+def _twine_env() -> dict[str, str]:
+    env = dict(os.environ)
+    for flit_name, twine_name in _FLIT_TO_TWINE_ENV.items():
+        if flit_name in env and twine_name not in env:
+            env[twine_name] = env[flit_name]
+    return env
+
+
+def _upload_artifacts(artifacts: list[Path]) -> None:
+    env = _twine_env()
+    with ThreadPoolExecutor(max_workers=len(artifacts)) as executor:
+        futures = [
+            executor.submit(
+                _run_checked, ["uvx", "twine", "upload", str(artifact)], env=env
+            )
+            for artifact in artifacts
+        ]
+        for future in futures:
+            future.result()
 
-        venv_dir = tmpdir_path / "venv"
-        print(f"INFO: Creating temporary smoke-test environment at {venv_dir}")
-        _run_checked(["python", "-m", "venv", str(venv_dir)])
-        pip = str(venv_dir / "bin" / "pip")
-        python = str(venv_dir / "bin" / "python")
 
-        _run_checked([pip, "install", "--upgrade", "pip"])
-        print(
-            "INFO: Installing core runtime dependencies into temp venv "
-            "(expected and required for the smoke check)."
-        )
-        _run_checked(
-            [
-                pip,
-                "install",
-                "lamin_utils==0.16.4",
-                "lamin_cli==1.14.1",
-                "lamindb_setup[aws]==1.22.0",
-                "pyyaml",
-                "typing_extensions!=4.6.0",
-                "python-dateutil",
-                "scipy<1.17.0",
-                "fsspec",
-                "graphviz",
-                "psycopg2-binary",
-            ]
-        )
-        _run_checked([pip, "install", str(core_wheel)])
-        _run_checked([python, "-c", "import lamindb"])
-        print("INFO: Core wheel import check passed.")
-        _run_checked([pip, "install", str(full_wheel)])
-        _run_checked([python, "-c", "import lamindb"])
-        print("INFO: Full wheel import check passed.")
-        _run_checked([pip, "uninstall", "-y", "lamindb"])
-        _run_checked([python, "-c", "import lamindb"])
-        print("INFO: Uninstall check passed (lamindb-core still imports).")
-
-
-def publish_lamindb_dual():
-    core_pyproject = Path("pyproject.toml")
-    full_pyproject = Path("pyproject.full.toml")
-    if not full_pyproject.exists():
-        raise SystemExit("Missing pyproject.full.toml for lamindb dual release flow.")
-
-    _run_checked(["flit", "-f", str(core_pyproject), "publish"])
-    _run_checked(["flit", "-f", str(full_pyproject), "publish"])
+def publish_lamindb_dual(artifacts: dict[Path, str]):
+    """Upload the built artifacts after verifying they weren't modified."""
+    for artifact, sha256 in artifacts.items():
+        if hash_file(artifact) != sha256:
+            raise SystemExit(f"{artifact} changed after it was built, not publishing.")
+    _run_checked(["uvx", "twine", "check", *map(str, artifacts)])
+    # lamindb pins lamindb-core, so the core distribution has to be published first
+    core = [artifact for artifact in artifacts if artifact.parent.name == "core"]
+    full = [artifact for artifact in artifacts if artifact.parent.name == "full"]
+    _upload_artifacts(core)
+    _upload_artifacts(full)
 
 
 def main():
     args = parser.parse_args()
 
     if args.command == "release":
+        from packaging.version import parse
+
+        from ._env import get_package_name
+        from ._release import (
+            get_last_version_from_tags,
+            read_repo_state,
+            release_commit_and_push,
+        )
+
         package_name = get_package_name()
         is_lamindb_dual_release = False
         if (
@@ -376,65 +540,57 @@ def main():
             return None
 
         # add all current files, assuming a clean directory
-        run("git add -u", shell=True)  # noqa: S602
+        _run_checked(["git", "add", "-u"])
+        state = read_repo_state()
         # check only the expected version bump files are staged
         additional_staged_files = (
             ["pyproject.full.toml"] if is_lamindb_dual_release else None
         )
         check_only_version_bump_staged(
-            package_name, additional_staged_files=additional_staged_files
+            package_name,
+            additional_staged_files=additional_staged_files,
+            staged_files=state.staged,
         )
-        expected_message = f"🔖 Release {version}"
-        commands = [
-            # please don't add git add -u here to not accidentally commit other files
-            f'git commit -m "{expected_message}"',
-            # please don't add an auto-pull here to not conflate when the release was made
-            "git push",
-            f"git tag {version}",
-            f"git push origin {version}",
-        ]
-        for command in commands:
-            print(f"\nrun: {command}")
-            run(command, shell=True)  # noqa: S602
-            # gitmoji might add a second emoji; ensure message starts with "🔖 Release"
-            if command.startswith("git commit -m "):
-                result = run(
-                    ["git", "log", "-1", "--format=%s"],
-                    capture_output=True,
-                    text=True,
-                )
-                if result.returncode == 0 and not result.stdout.strip().startswith(
-                    "🔖 Release"
-                ):
-                    print(f'\nrun: git commit --amend -m "{expected_message}"')
-                    run(f'git commit --amend -m "{expected_message}"', shell=True)  # noqa: S602
+        # please don't add git add -u here to not accidentally commit other files
+        # please don't add an auto-pull here to not conflate when the release was made
+        release_commit_and_push(version, state)
 
         changelog_link = (
             args.changelog
             if args.changelog is not None
             else "https://docs.lamin.ai/changelog"
         )
-        # breakpoint()
-        publish_github_release(
-            repo_name=f"laminlabs/{repo_name}",
-            version=version,
-            release_name=f"Release {version}",
-            body=f"See {changelog_link}",
-        )
-        if is_laminhub:
-            update_readme_version("./laminhub-public/README.md", version)
-            for command in commands:
-                print(f"\nrun: {command}")
-                run(command, shell=True, cwd="./laminhub-public")  # noqa: S602
+
+        def release_laminhub_public():
+            cwd = "./laminhub-public"
+            update_readme_version(f"{cwd}/README.md", version)
+            _run_checked(["git", "add", "README.md"], cwd=cwd)
+            release_commit_and_push(version, read_repo_state(cwd), cwd=cwd)
             publish_github_release(
                 repo_name="laminlabs/laminhub-public",
                 version=version,
                 body=f"See {changelog_link}",
                 release_name=f"Release {version}",
                 generate_release_notes=False,
-                cwd="./laminhub-public",
             )
 
+        # the submodule release is independent of the release of the main repo, so
+        # both GitHub releases are created concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(
+                    publish_github_release,
+                    repo_name=f"laminlabs/{repo_name}",
+                    version=version,
+                    release_name=f"Release {version}",
+                    body=f"See {changelog_link}",
+                )
+            ]
+            if is_laminhub:
+                futures.append(executor.submit(release_laminhub_public))
+            for future in futures:
+                future.result()
+
         if args.pypi:
             if is_lamindb_dual_release:
                 print(
@@ -442,9 +598,14 @@ def main():
                     "Running pre-publish dependency pin check."
                 )
                 _assert_lamindb_dependency_pin(version)
+                # build once, the smoke-checked artifacts are the ones published
+                dist_dir = Path("dist") / f"lamindb-dual-{version}"
+                shutil.rmtree(dist_dir, ignore_errors=True)
                 if args.lamindb_dual_smoke_checks:
-                    run_lamindb_dual_smoke_checks(version)
-                publish_lamindb_dual()
+                    artifacts = run_lamindb_dual_smoke_checks(version, dist_dir)
+                else:
+                    artifacts = build_lamindb_dual(dist_dir, version)
+                publish_lamindb_dual(artifacts)
             else:
                 command = "flit publish"
                 print(f"\nrun: {command}")
@@ -452,8 +613,25 @@ def main():
     elif args.command == "doc-changes":
         from ._doc_changes import doc_changes
 
-        doc_changes()
+        doc_changes(numbers=args.numbers, since_last_entry=args.since_last_entry)
     elif args.command == "upload-docs":
         from ._docs_artifacts import upload_docs_artifact
 
-        upload_docs_artifact(docs_dir=args.dir, in_pr=args.in_pr)
+        upload_docs_artifact(
+            docs_dir=args.dir,
+            in_pr=args.in_pr,
+            incremental=args.incremental,
+            chunk_size=args.chunk_size * 1024**2,
+            concurrency=args.concurrency,
+            max_attempts=args.max_attempts,
+        )
+    elif args.command == "run-notebooks":
+        from ._run_notebooks import run_notebooks
+
+        run_notebooks(
+            args.path,
+            workers=args.workers,
+            independent=args.independent,
+            cache_dir=args.cache_dir,
+            force=args.force,
+        )
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import time
+from pathlib import Path
+
+CACHE_DIR_ENV = "LAMINCI_CACHE_DIR"
+
+
+def resolve_cache_dir(cache_dir: str | Path | None, name: str) -> Path | None:
+    """Return the cache directory `name`, `None` if caching is disabled.
+
+    Caching is enabled by passing `cache_dir` or by setting `LAMINCI_CACHE_DIR`,
+    typically to a directory that's persisted by the CI cache.
+    """
+    if cache_dir is None:
+        cache_dir = os.getenv(CACHE_DIR_ENV)
+        if not cache_dir:
+            return None
+    # absolute, so that paths stay valid after a chdir and can be used as URIs
+    path = Path(cache_dir).absolute() / name
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def hash_bytes(*chunks: bytes) -> str:
+    h = hashlib.sha256()
+    for chunk in chunks:
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_file(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def touch(path: Path) -> None:
+    """Mark a cache entry as recently used."""
+    os.utime(path)
+
+
+def publish_dir(tmp_dir: Path, target: Path) -> bool:
+    """Move a fully built cache entry into place.
+
+    Returns `False` if a concurrent job published `target` first, in which case
+    `tmp_dir` is discarded and the existing entry should be used.
+    """
+    try:
+        tmp_dir.rename(target)
+    except OSError:
+        # ENOTEMPTY or EEXIST, depending on the platform
+        if not target.exists():
+            raise
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+    return True
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def clone_tree(src: Path, dst: Path) -> None:
+    """Cheap copy of a directory tree that hardlinks files where possible.
+
+    Only safe for trees whose files are replaced rather than modified in place,
+    like environments managed by pip or uv.
+    """
+    shutil.copytree(src, dst, symlinks=True, copy_function=_link_or_copy)
+
+
+def _entry_size(path: Path) -> int:
+    if path.is_dir() and not path.is_symlink():
+        return sum(
+            f.lstat().st_size for f in path.rglob("*") if f.is_file() or f.is_symlink()
+        )
+    return path.lstat().st_size
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def evict(
+    directory: Path,
+    max_bytes: int | None = None,
+    max_age: float | None = None,
+) -> list[Path]:
+    """Evict entries of a cache directory.
+
+    First removes entries that weren't used for `max_age` seconds, then removes
+    the least recently used entries until the cache fits into `max_bytes`.
+    """
+    entries = [(p, p.lstat().st_mtime) for p in directory.iterdir()]
+    entries.sort(key=lambda entry: entry[1])
+    now = time.time()
+    evicted = []
+    kept = []
+    for path, mtime in entries:
+        if max_age is not None and now - mtime > max_age:
+            _remove(path)
+            evicted.append(path)
+        else:
+            kept.append((path, _entry_size(path)))
+    if max_bytes is not None:
+        total = sum(size for _, size in kept)
+        for path, size in kept:
+            if total <= max_bytes:
+                break
+            _remove(path)
+            evicted.append(path)
+            total -= size
+    return evicted
@@ -2,22 +2,22 @@ import os
 import shutil
 from pathlib import Path
 
-from ._env import load_project_yaml
+from ._env import get_project_slug
 
 
 def move_built_docs_to_slash_project_slug():
     if os.environ["GITHUB_EVENT_NAME"] != "push":
         return
-    yaml = load_project_yaml()
+    project_slug = get_project_slug()
     shutil.move("_build/html", "_build/html_tmp")
     Path.mkdir("_build/html", parents=True)
-    shutil.move("_build/html_tmp", f"_build/html/{yaml['project_slug']}")
+    shutil.move("_build/html_tmp", f"_build/html/{project_slug}")
 
 
 def move_built_docs_to_docs_slash_project_slug():
     if os.environ["GITHUB_EVENT_NAME"] != "push":
         return
-    yaml = load_project_yaml()
-    shutil.move("_build/html", f"_build/{yaml['project_slug']}")
+    project_slug = get_project_slug()
+    shutil.move("_build/html", f"_build/{project_slug}")
     Path.mkdir("_build/html/docs", parents=True)
-    shutil.move(f"_build/{yaml['project_slug']}", "_build/html/docs")
+    shutil.move(f"_build/{project_slug}", "_build/html/docs")
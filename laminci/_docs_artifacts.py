@@ -1,8 +1,15 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from subprocess import run
-from zipfile import ZipFile
+from typing import BinaryIO
+
+from ._zip import write_zip
 
 
 def get_repo_name() -> str:
@@ -14,17 +21,43 @@ def get_repo_name() -> str:
     return repo_name
 
 
-def zip_docs_dir(zip_filename: str, docs_dir: str = "./docs") -> None:
-    with ZipFile(zip_filename, "w") as zf:
-        zf.write("README.md")
-        for f in Path(docs_dir).glob("**/*"):
-            if ".ipynb_checkpoints" in str(f):
+DOCS_SUFFIXES = {".md", ".ipynb", ".png", ".jpg", ".svg", ".py", ".R"}
+
+
+def scan_docs_dir(docs_dir: str = "./docs") -> list[tuple[str, str]]:
+    """List the files of the docs artifact as `(path, arcname)` in a single walk."""
+    files = [("README.md", "README.md")]
+    stack = [Path(docs_dir)]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        names = {entry.name for entry in entries}
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir():
+                if entry.name != ".ipynb_checkpoints":
+                    subdirs.append(Path(entry.path))
+                continue
+            path = Path(entry.path)
+            if path.suffix not in DOCS_SUFFIXES:
                 continue
-            if f.suffix in {".md", ".ipynb", ".png", ".jpg", ".svg", ".py", ".R"}:
-                # do not duplicate markdown and ipynb files
-                if f.suffix == ".md" and f.with_suffix(".ipynb").exists():
-                    continue
-                zf.write(f, f.relative_to(docs_dir))  # add at root level
+            # do not duplicate markdown and ipynb files
+            if path.suffix == ".md" and f"{path.stem}.ipynb" in names:
+                continue
+            # add at root level
+            files.append((entry.path, path.relative_to(docs_dir).as_posix()))
+        stack.extend(reversed(subdirs))
+    return files
+
+
+def write_docs_zip(fileobj: BinaryIO, docs_dir: str = "./docs") -> None:
+    write_zip(fileobj, scan_docs_dir(docs_dir))
+
+
+def zip_docs_dir(zip_filename: str, docs_dir: str = "./docs") -> None:
+    with open(zip_filename, "wb") as f:
+        write_docs_zip(f, docs_dir)
 
 
 def zip_docs(docs_dir: str = "./docs"):
@@ -34,17 +67,9 @@ def zip_docs(docs_dir: str = "./docs"):
     return repo_name, zip_filename
 
 
-def process_markdown_file(input_file: str, output_file: str):
-    """Process a raw markdown document.
-
-    Add hide-output tags to all code cells in a markdown file.
-    Add a badge with the source code link on GitHub.
-    """
-    repo_name = get_repo_name()
-    rel_path = Path(input_file).resolve().relative_to(Path.cwd())
+def _process_markdown(content: str, rel_path: Path, repo_name: str) -> str:
     source_url = f"https://github.com/laminlabs/{repo_name}/blob/main/{rel_path}"
     badge = f"[![.md](https://img.shields.io/badge/source-green)]({source_url})"
-    content = open(input_file).read()
     content = re.sub(r"^---\n.*?\n---\n?", "", content, flags=re.DOTALL)
     content = re.sub(r"```python\n", r'```python tags=["hide-output"]\n', content)
     if re.search(r"^# ", content, flags=re.MULTILINE):
@@ -53,26 +78,85 @@ def process_markdown_file(input_file: str, output_file: str):
         )
     else:
         content = f"{badge}\n\n{content}"
-    open(output_file, "w").write(content)
-
-
-def convert_executable_md_files(docs_dir: str = "./docs") -> None:
-    for md_path in Path(docs_dir).glob("**/*.md"):
-        head = md_path.read_text().splitlines()[:20]
-        if "execute_via:" not in "\n".join(head):
-            continue
-        stem = md_path.stem
-        processed = md_path.parent / f"{stem}_processed.md"
-        notebook_path = md_path.parent / f"{stem}.ipynb"
-        process_markdown_file(str(md_path), str(processed))
-        os.system(
-            f"jupytext --from md:markdown {processed} --to notebook --output {notebook_path}"
+    return content
+
+
+def process_markdown_file(
+    input_file: str, output_file: str, repo_name: str | None = None
+):
+    """Process a raw markdown document.
+
+    Add hide-output tags to all code cells in a markdown file.
+    Add a badge with the source code link on GitHub.
+    """
+    repo_name = get_repo_name() if repo_name is None else repo_name
+    rel_path = Path(input_file).resolve().relative_to(Path.cwd())
+    content = open(input_file).read()
+    open(output_file, "w").write(_process_markdown(content, rel_path, repo_name))
+
+
+def _is_executable_md(md_path: Path) -> bool:
+    # only read the header, not the whole document
+    with md_path.open() as f:
+        head = "".join(itertools.islice(f, 20))
+    return "execute_via:" in head
+
+
+def _convert_md_to_notebook(md_path: Path, rel_path: Path, repo_name: str) -> bool:
+    """Convert an executable markdown file to a notebook, return whether it ran."""
+    import jupytext
+
+    content = md_path.read_text()
+    notebook_path = md_path.with_suffix(".ipynb")
+    source_hash = hashlib.sha256(f"{repo_name}\n{content}".encode()).hexdigest()
+    converted = False
+    if notebook_path.exists():
+        metadata = json.loads(notebook_path.read_text()).get("metadata", {})
+        up_to_date = metadata.get("laminci", {}).get("source_hash") == source_hash
+    else:
+        up_to_date = False
+    if not up_to_date:
+        processed = _process_markdown(content, rel_path, repo_name)
+        notebook = jupytext.reads(processed, fmt="md:markdown")
+        notebook.metadata["laminci"] = {"source_hash": source_hash}
+        jupytext.write(notebook, notebook_path, fmt="ipynb")
+        converted = True
+    md_path.unlink()
+    return converted
+
+
+def convert_executable_md_files(
+    docs_dir: str = "./docs", workers: int | None = None
+) -> None:
+    md_paths = [p for p in Path(docs_dir).glob("**/*.md") if _is_executable_md(p)]
+    if not md_paths:
+        return None
+    repo_name = get_repo_name()
+    cwd = Path.cwd()
+    rel_paths = [p.resolve().relative_to(cwd) for p in md_paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        converted = list(
+            executor.map(
+                _convert_md_to_notebook,
+                md_paths,
+                rel_paths,
+                [repo_name] * len(md_paths),
+            )
         )
-        os.system(f"rm {md_path} {processed}")
+    print(
+        f"Converted {sum(converted)} executable markdown files to notebooks,"
+        f" {len(converted) - sum(converted)} were up to date."
+    )
 
 
 def upload_docs_artifact(
-    aws: bool = False, docs_dir: str = "./docs", in_pr: bool = False
+    aws: bool = False,
+    docs_dir: str = "./docs",
+    in_pr: bool = False,
+    incremental: bool = False,
+    chunk_size: int = 8 * 1024**2,
+    concurrency: int = 10,
+    max_attempts: int = 5,
 ) -> None:
     if not in_pr:
         if os.getenv("GITHUB_EVENT_NAME") not in {"push", "repository_dispatch"}:
@@ -80,8 +164,12 @@ def upload_docs_artifact(
             return None
     if aws:
         print("aws arg no longer needed")
-    _, zip_filename = zip_docs(docs_dir)
-    run(  # noqa: S602
-        f"aws s3 cp {zip_filename} s3://lamin-site-assets/docs/{zip_filename}",
-        shell=True,
-    )
+    from ._docs_upload import make_s3_client, upload_docs_full, upload_docs_incremental
+
+    client = make_s3_client(max_attempts=max_attempts)
+    if incremental:
+        upload_docs_incremental(client, docs_dir=docs_dir)
+    else:
+        upload_docs_full(
+            client, docs_dir=docs_dir, chunk_size=chunk_size, concurrency=concurrency
+        )
@@ -0,0 +1,369 @@
+"""Upload of the docs artifact with boto3.
+
+A full upload streams the zip into a managed multipart upload.
+
+An incremental upload keeps a manifest `docs/{repo}.manifest.json` next to
+`docs/{repo}.zip` that records the content hash, zip metadata and byte range of
+every member. On the next upload, only changed members are compressed and
+uploaded. The new archive is assembled server-side in a multipart upload: runs
+of unchanged members are copied from the previous archive with `UploadPartCopy`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from ._cache import hash_file
+from ._docs_artifacts import get_repo_name, scan_docs_dir, write_docs_zip
+from ._zip import ZipEntry, ZipStreamWriter, compress_files
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+BUCKET = "lamin-site-assets"
+# S3 requires all parts except the last one to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024**2
+PART_SIZE = 8 * 1024**2
+MANIFEST_VERSION = 1
+
+
+class _MultipartComposer:
+    """Writable stream that assembles an S3 object from new bytes and copied ranges."""
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        key: str,
+        source_key: str | None = None,
+        source_etag: str | None = None,
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.source_key = source_key
+        self.source_etag = source_etag
+        self.upload_id = client.create_multipart_upload(Bucket=bucket, Key=key)[
+            "UploadId"
+        ]
+        self.parts: list[dict] = []
+        self.buffer = bytearray()
+        self.pending_copy: list[int] | None = None
+        self.stats = {"uploaded": 0, "copied": 0, "downloaded": 0}
+
+    def _upload_buffer(self) -> None:
+        response = self.client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=len(self.parts) + 1,
+            Body=bytes(self.buffer),
+        )
+        self.parts.append({"ETag": response["ETag"], "PartNumber": len(self.parts) + 1})
+        self.stats["uploaded"] += len(self.buffer)
+        self.buffer.clear()
+
+    def _download(self, start: int, end: int) -> None:
+        response = self.client.get_object(
+            Bucket=self.bucket,
+            Key=self.source_key,
+            Range=f"bytes={start}-{end - 1}",
+            IfMatch=self.source_etag,
+        )
+        self.buffer += response["Body"].read()
+        self.stats["downloaded"] += end - start
+
+    def _flush_copy(self) -> None:
+        if self.pending_copy is None:
+            return None
+        start, end = self.pending_copy
+        self.pending_copy = None
+        # bytes written before the copied range have to form a valid part
+        if self.buffer and len(self.buffer) < MIN_PART_SIZE:
+            n = min(MIN_PART_SIZE - len(self.buffer), end - start)
+            self._download(start, start + n)
+            start += n
+        if end - start >= MIN_PART_SIZE:
+            if self.buffer:
+                self._upload_buffer()
+            response = self.client.upload_part_copy(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self.upload_id,
+                PartNumber=len(self.parts) + 1,
+                CopySource={"Bucket": self.bucket, "Key": self.source_key},
+                CopySourceRange=f"bytes={start}-{end - 1}",
+                CopySourceIfMatch=self.source_etag,
+            )
+            self.parts.append(
+                {
+                    "ETag": response["CopyPartResult"]["ETag"],
+                    "PartNumber": len(self.parts) + 1,
+                }
+            )
+            self.stats["copied"] += end - start
+        elif end > start:
+            self._download(start, end)
+
+    def copy(self, start: int, end: int) -> None:
+        """Copy the byte range `[start, end)` of the source object."""
+        if self.pending_copy is not None and self.pending_copy[1] == start:
+            self.pending_copy[1] = end
+        else:
+            self._flush_copy()
+            self.pending_copy = [start, end]
+
+    def write(self, data: bytes) -> None:
+        self._flush_copy()
+        self.buffer += data
+        if len(self.buffer) >= PART_SIZE:
+            self._upload_buffer()
+
+    def flush(self) -> None:
+        pass
+
+    def complete(self) -> str:
+        self._flush_copy()
+        if self.buffer or not self.parts:
+            self._upload_buffer()
+        response = self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={"Parts": self.parts},
+        )
+        return response["ETag"]
+
+    def abort(self) -> None:
+        self.client.abort_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id
+        )
+
+
+def _hash_files(files: list[tuple[str, str]]) -> list[str]:
+    with ThreadPoolExecutor() as executor:
+        return list(executor.map(hash_file, [path for path, _ in files]))
+
+
+def _load_manifest(client: Any, bucket: str, key: str) -> dict | None:
+    try:
+        response = client.get_object(Bucket=bucket, Key=key)
+    except client.exceptions.NoSuchKey:
+        return None
+    manifest = json.loads(response["Body"].read())
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def _compose(
+    client: Any,
+    bucket: str,
+    key: str,
+    files: list[tuple[str, str]],
+    hashes: list[str],
+    previous: dict | None,
+) -> tuple[dict, dict]:
+    reusable = {}
+    if previous is not None:
+        reusable = {(m["arcname"], m["sha256"]): m for m in previous["members"]}
+    changed = [
+        (path, arcname)
+        for (path, arcname), sha256 in zip(files, hashes, strict=True)
+        if (arcname, sha256) not in reusable
+    ]
+    # changed members are compressed in the background, in archive order
+    compressed = compress_files(changed)
+    composer = _MultipartComposer(
+        client,
+        bucket,
+        key,
+        source_key=key if previous is not None else None,
+        source_etag=previous["etag"] if previous is not None else None,
+    )
+    writer = ZipStreamWriter(composer)  # type: ignore
+    members = []
+    try:
+        for (_, arcname), sha256 in zip(files, hashes, strict=True):
+            if (arcname, sha256) in reusable:
+                member = reusable[(arcname, sha256)]
+                entry = ZipEntry(**member["entry"])
+                composer.copy(member["offset"], member["offset"] + member["length"])
+                length = member["length"]
+                offset = writer.record(entry, length)
+            else:
+                entry, data = next(compressed)
+                offset, length = writer.write(entry, data)
+            members.append(
+                {
+                    "arcname": arcname,
+                    "sha256": sha256,
+                    "offset": offset,
+                    "length": length,
+                    "entry": asdict(entry),
+                }
+            )
+        writer.close()
+        etag = composer.complete()
+    except BaseException:
+        composer.abort()
+        raise
+    manifest = {"version": MANIFEST_VERSION, "etag": etag, "members": members}
+    stats = {**composer.stats, "changed": len(changed), "members": len(files)}
+    return manifest, stats
+
+
+def upload_docs_incremental(
+    client: Any,
+    repo_name: str | None = None,
+    docs_dir: str | Path = "./docs",
+    bucket: str = BUCKET,
+) -> dict:
+    """Upload the docs artifact, reusing unchanged members of the previous upload.
+
+    Returns statistics about the upload: number of changed members and bytes
+    uploaded, copied server-side and downloaded to pad parts.
+    """
+    t_start = perf_counter()
+    repo_name = get_repo_name() if repo_name is None else repo_name
+    key = f"docs/{repo_name}.zip"
+    manifest_key = f"docs/{repo_name}.manifest.json"
+    files = scan_docs_dir(str(docs_dir))
+    hashes = _hash_files(files)
+    previous = _load_manifest(client, bucket, manifest_key)
+    if previous is not None and [
+        (m["arcname"], m["sha256"]) for m in previous["members"]
+    ] == [
+        (arcname, sha256) for (_, arcname), sha256 in zip(files, hashes, strict=True)
+    ]:
+        print(f"Docs artifact s3://{bucket}/{key} is up to date.")
+        return {"changed": 0, "members": len(files), "uploaded": 0, "copied": 0}
+    try:
+        manifest, stats = _compose(client, bucket, key, files, hashes, previous)
+    except client.exceptions.ClientError as e:
+        # the archive doesn't match the manifest anymore, e.g., it was replaced
+        # by a full upload
+        if previous is None or e.response["Error"]["Code"] not in {
+            "PreconditionFailed",
+            "NoSuchKey",
+            "InvalidRange",
+        }:
+            raise
+        print(f"Can't reuse previous docs artifact ({e}), uploading all members.")
+        manifest, stats = _compose(client, bucket, key, files, hashes, None)
+    client.put_object(
+        Bucket=bucket, Key=manifest_key, Body=json.dumps(manifest).encode()
+    )
+    print(
+        f"Uploaded docs artifact s3://{bucket}/{key}: {stats['changed']}/"
+        f"{stats['members']} members changed, {stats['uploaded']} bytes uploaded,"
+        f" {stats['copied']} bytes copied server-side"
+        f" ({perf_counter() - t_start:.3f}s)"
+    )
+    return stats
+
+
+def make_s3_client(max_attempts: int = 5) -> Any:
+    """S3 client that retries throttling and transient errors with backoff."""
+    import boto3
+    from botocore.config import Config
+
+    # "standard" retries use exponential backoff with jitter
+    config = Config(retries={"max_attempts": max_attempts, "mode": "standard"})
+    return boto3.client("s3", config=config)
+
+
+class _TransferProgress:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bytes = 0
+        self.t_start = perf_counter()
+        self.t_first: float | None = None
+
+    def __call__(self, n: int) -> None:
+        with self.lock:
+            if self.t_first is None:
+                self.t_first = perf_counter()
+            self.bytes += n
+
+
+class _PipeReader:
+    """Read end of the pipe that fails instead of signalling EOF on errors.
+
+    Otherwise a failure while zipping would upload a truncated archive.
+    """
+
+    def __init__(self, fileobj: BinaryIO, errors: list[BaseException]):
+        self.fileobj = fileobj
+        self.errors = errors
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.fileobj.read(size)
+        if not data and self.errors:
+            raise RuntimeError("Zipping the docs failed") from self.errors[0]
+        return data
+
+
+def upload_docs_full(
+    client: Any,
+    repo_name: str | None = None,
+    docs_dir: str | Path = "./docs",
+    bucket: str = BUCKET,
+    chunk_size: int = PART_SIZE,
+    concurrency: int = 10,
+) -> dict:
+    """Zip the docs and stream them into a managed multipart upload.
+
+    Returns transfer statistics: bytes, seconds, throughput in bytes/s and the
+    latency until the first bytes were sent.
+    """
+    from boto3.s3.transfer import TransferConfig
+
+    repo_name = get_repo_name() if repo_name is None else repo_name
+    key = f"docs/{repo_name}.zip"
+    config = TransferConfig(
+        multipart_threshold=chunk_size,
+        multipart_chunksize=chunk_size,
+        max_concurrency=concurrency,
+    )
+    progress = _TransferProgress()
+    errors: list[BaseException] = []
+    read_fd, write_fd = os.pipe()
+
+    def produce():
+        try:
+            with open(write_fd, "wb") as f:
+                write_docs_zip(f, str(docs_dir))
+        except BaseException as e:
+            errors.append(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    # closing the read end on failure unblocks the producer with a broken pipe
+    with open(read_fd, "rb") as f:
+        client.upload_fileobj(
+            _PipeReader(f, errors), bucket, key, Config=config, Callback=progress
+        )
+    producer.join()
+    if errors:
+        raise errors[0]
+    seconds = perf_counter() - progress.t_start
+    latency = (progress.t_first or progress.t_start) - progress.t_start
+    stats = {
+        "bytes": progress.bytes,
+        "seconds": seconds,
+        "throughput": progress.bytes / seconds if seconds else 0.0,
+        "latency": latency,
+    }
+    print(
+        f"Uploaded docs artifact s3://{bucket}/{key}: {stats['bytes'] / 1024**2:.1f}"
+        f" MiB in {seconds:.3f}s ({stats['throughput'] / 1024**2:.1f} MiB/s,"
+        f" first bytes sent after {latency:.3f}s)"
+    )
+    return stats
@@ -1,44 +1,132 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
-import tomlkit  # type: ignore
-import yaml  # type: ignore
+PROJECT_YAML = "lamin-project.yaml"
+PYPROJECT = "pyproject.toml"
+
+
+@dataclass(frozen=True)
+class ProjectConfig:
+    """Metadata of the project, from `lamin-project.yaml` or `pyproject.toml`.
+
+    Use `ProjectConfig.load()`, which caches the parsed file until it changes.
+    """
+
+    path: Optional[Path] = None
+    package_name: Optional[str] = None
+    project_slug: Optional[str] = None
+    version: Optional[str] = None
+    data: dict = field(default_factory=dict, repr=False)
+
+    @property
+    def schema_handle(self) -> Optional[str]:
+        if self.package_name is not None and self.package_name.startswith("lnschema_"):
+            return self.package_name.replace("lnschema_", "")
+        return None
+
+    @classmethod
+    def load(cls, root_directory: Optional[Path] = None) -> ProjectConfig:
+        root_directory = Path() if root_directory is None else Path(root_directory)
+        for name in (PROJECT_YAML, PYPROJECT):
+            path = (root_directory / name).resolve()
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            key = (path, stat.st_mtime_ns, stat.st_size)
+            with _cache_lock:
+                config = _cache.get(path)
+                if config is None or config[0] != key:
+                    config = (key, _parse(path))
+                    _cache[path] = config
+            return config[1]
+        return cls()
+
+
+_cache: dict[Path, tuple[tuple, ProjectConfig]] = {}
+_cache_lock = threading.Lock()
+
+
+def _read_version(module_dir: Path) -> Optional[str]:
+    # flit reads dynamic versions from `__version__` of the module
+    init = module_dir / "__init__.py"
+    if not init.exists():
+        return None
+    match = re.search(
+        r"^__version__\s*=\s*[\"']([^\"']+)[\"']", init.read_text(), re.MULTILINE
+    )
+    return match.group(1) if match else None
+
+
+def _parse(path: Path) -> ProjectConfig:
+    if path.name == PROJECT_YAML:
+        import yaml  # type: ignore
+
+        with path.open() as f:
+            data = yaml.safe_load(f) or {}
+        package_name = data.get("package_name")
+        version = None
+        if package_name is not None:
+            version = _read_version(path.parent / package_name)
+        return ProjectConfig(
+            path=path,
+            package_name=package_name,
+            project_slug=data.get("project_slug"),
+            version=version,
+            data=data,
+        )
+    import tomllib
+
+    with path.open("rb") as f:
+        data = tomllib.load(f)
+    project = data.get("project", {})
+    package_name = project["name"].replace("-", "_")
+    module = data.get("tool", {}).get("flit", {}).get("module", {}).get("name")
+    version = project.get("version") or _read_version(
+        path.parent / (module or package_name)
+    )
+    return ProjectConfig(
+        path=path,
+        package_name=package_name,
+        version=version,
+        data=data,
+    )
 
 
 def load_project_yaml(root_directory: Optional[Path] = None) -> dict:
-    yaml_file = Path("lamin-project.yaml")
+    yaml_file = Path(PROJECT_YAML)
     if root_directory is None:
         root_directory = Path()
-    yaml_file = root_directory / yaml_file
-    with yaml_file.open() as f:
-        d = yaml.safe_load(f)
-    return d
+    config = ProjectConfig.load(root_directory)
+    if config.path is None or config.path.name != PROJECT_YAML:
+        raise FileNotFoundError(root_directory / yaml_file)
+    return dict(config.data)
 
 
 def get_package_name(root_directory: Optional[Path] = None) -> Optional[str]:
-    if Path("lamin-project.yaml").exists():
-        config = load_project_yaml(root_directory=root_directory)
-        if "package_name" in config:
-            return config["package_name"]
-        else:
-            return None
-    elif Path("pyproject.toml").exists():
-        with open("pyproject.toml") as f:
-            d = tomlkit.load(f)
-        return d["project"]["name"].replace("-", "_")
-    else:
-        return None
+    return ProjectConfig.load(root_directory).package_name
 
 
 def get_schema_handle() -> Optional[str]:
-    package_name = get_package_name()
-    if package_name is not None:
-        if package_name.startswith("lnschema_"):
-            return package_name.replace("lnschema_", "")
-        else:
-            return None
+    config = ProjectConfig.load()
+    if config.package_name is not None:
+        return config.schema_handle
     else:
         raise ValueError(
             "Could not infer python package, add pyproject.toml or update"
             " lamin-project.yaml"
         )
+
+
+def get_project_slug(root_directory: Optional[Path] = None) -> str:
+    config = ProjectConfig.load(root_directory)
+    if config.project_slug is None:
+        raise ValueError(
+            "Could not infer the project slug, add project_slug to lamin-project.yaml"
+        )
+    return config.project_slug
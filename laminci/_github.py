@@ -0,0 +1,198 @@
+"""Minimal GitHub REST client for publishing releases.
+
+All requests go through one pooled `urllib3.PoolManager`, so that concurrent
+releases share connections. Requests are retried with backoff on secondary rate
+limits (403/429) and server errors, see `GitHubClient.request`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+from typing import Any
+
+API_URL_ENV = "GITHUB_API_URL"
+DEFAULT_API_URL = "https://api.github.com"
+
+
+class GitHubError(RuntimeError):
+    def __init__(
+        self,
+        status: int,
+        message: str,
+        code: str | None = None,
+        after_server_error: bool = False,
+    ):
+        super().__init__(f"GitHub API error {status}: {message}")
+        self.status = status
+        # code of the first validation error, e.g., "already_exists"
+        self.code = code
+        # an earlier attempt failed with a server error and may have gone through
+        self.after_server_error = after_server_error
+
+
+def _decode(data: bytes) -> Any:
+    # error pages of proxies and load balancers aren't JSON
+    try:
+        return json.loads(data) if data else None
+    except ValueError:
+        return None
+
+
+def get_github_token() -> str:
+    """Token from `GITHUB_TOKEN`, otherwise from an authenticated GitHub CLI."""
+    token = os.getenv("GITHUB_TOKEN")
+    if token:
+        return token
+    try:
+        result = subprocess.run(
+            ["gh", "auth", "token"], check=True, capture_output=True, text=True
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        raise SystemExit(
+            "No GitHub token: set GITHUB_TOKEN or log in with `gh auth login`."
+        ) from None
+    return result.stdout.strip()
+
+
+class GitHubClient:
+    def __init__(
+        self,
+        token: str | None = None,
+        api_url: str | None = None,
+        max_attempts: int = 5,
+        max_wait: float = 60.0,
+    ):
+        import urllib3
+
+        self.token = token
+        self.api_url = (api_url or os.getenv(API_URL_ENV) or DEFAULT_API_URL).rstrip(
+            "/"
+        )
+        self.max_attempts = max_attempts
+        self.max_wait = max_wait
+        self.pool = urllib3.PoolManager(
+            maxsize=4, retries=False, timeout=urllib3.Timeout(connect=10, read=60)
+        )
+        self._token_lock = threading.Lock()
+
+    def _headers(self) -> dict[str, str]:
+        with self._token_lock:
+            if self.token is None:
+                self.token = get_github_token()
+        return {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {self.token}",
+            "X-GitHub-Api-Version": "2022-11-28",
+            "User-Agent": "laminci",
+            "Content-Type": "application/json",
+        }
+
+    def _wait(self, response: Any, attempt: int) -> float:
+        retry_after = response.headers.get("retry-after")
+        if retry_after is not None:
+            return float(retry_after)
+        if response.headers.get("x-ratelimit-remaining") == "0":
+            reset = float(response.headers.get("x-ratelimit-reset", 0))
+            return max(reset - time.time(), 0.0)
+        return random.uniform(0, 2**attempt)  # noqa: S311
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        payload: dict | None = None,
+        retry_server_errors: bool | None = None,
+    ) -> Any:
+        """Send a request and return the decoded JSON response.
+
+        Server errors are only retried for idempotent methods unless
+        `retry_server_errors` is set: a POST may have gone through before the
+        error. Rate limited requests weren't processed and are always retried.
+        """
+        if retry_server_errors is None:
+            retry_server_errors = method in {"GET", "HEAD", "PUT", "DELETE"}
+        body = json.dumps(payload).encode() if payload is not None else None
+        after_server_error = False
+        for attempt in range(self.max_attempts):
+            response = self.pool.request(
+                method, f"{self.api_url}{path}", body=body, headers=self._headers()
+            )
+            if response.status < 400:
+                return json.loads(response.data) if response.data else None
+            data = _decode(response.data)
+            data = data if isinstance(data, dict) else {}
+            message = data.get("message", "")
+            errors = data.get("errors") or [{}]
+            code = errors[0].get("code") if isinstance(errors[0], dict) else None
+            server_error = response.status in {500, 502, 503, 504}
+            # secondary rate limits are signalled with 403 and a rate limit message
+            retryable = (
+                response.status == 429
+                or server_error
+                and retry_server_errors
+                or response.status == 403
+                and (
+                    "rate limit" in message.lower()
+                    or "retry-after" in response.headers
+                    or response.headers.get("x-ratelimit-remaining") == "0"
+                )
+            )
+            if not retryable or attempt == self.max_attempts - 1:
+                raise GitHubError(response.status, message, code, after_server_error)
+            after_server_error = after_server_error or server_error
+            wait = min(self._wait(response, attempt), self.max_wait)
+            print(f"GitHub API returned {response.status}, retrying in {wait:.1f}s")
+            time.sleep(wait)
+
+    def create_release(
+        self,
+        repo_name: str,
+        tag: str,
+        name: str,
+        body: str = "",
+        draft: bool = False,
+        prerelease: bool = False,
+        generate_release_notes: bool = True,
+    ) -> dict:
+        try:
+            return self.request(
+                "POST",
+                f"/repos/{repo_name}/releases",
+                {
+                    "tag_name": tag,
+                    "name": name,
+                    "body": body,
+                    "draft": draft,
+                    "prerelease": prerelease,
+                    "generate_release_notes": generate_release_notes,
+                },
+                retry_server_errors=True,
+            )
+        except GitHubError as e:
+            if not (e.after_server_error and e.code == "already_exists"):
+                raise
+            # the attempt that failed with a server error did create the release,
+            # list releases rather than get it by tag, which misses drafts
+            releases = self.request("GET", f"/repos/{repo_name}/releases?per_page=100")
+            for release in releases:
+                if release["tag_name"] == tag:
+                    return release
+            raise
+
+
+_client: GitHubClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_github_client() -> GitHubClient:
+    """Process-wide client, so that all requests share one connection pool."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GitHubClient()
+        return _client
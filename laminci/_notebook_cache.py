@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import ast
+import json
+import platform
+import shutil
+from importlib import metadata
+from pathlib import Path
+
+from ._cache import evict, hash_bytes, hash_file, touch
+
+LOCKFILES = (
+    "pyproject.toml",
+    "uv.lock",
+    "poetry.lock",
+    "requirements.txt",
+    "environment.yml",
+    "lamin-project.yaml",
+)
+
+
+def _imported_modules(tree: ast.AST, module: str = "", is_package=False) -> set[str]:
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                # resolve relative imports against the importing module
+                parts = module.split(".")
+                base = parts[: len(parts) - node.level + is_package]
+                prefix = ".".join(base + ([node.module] if node.module else []))
+            else:
+                prefix = node.module or ""
+            names.add(prefix)
+            # `from pkg import submodule`
+            names.update(f"{prefix}.{alias.name}" for alias in node.names)
+    return names
+
+
+class _PackageSources:
+    """Hashes of the package modules that code transitively imports."""
+
+    def __init__(self, package_name: str | None, root: Path):
+        self.package_name = package_name
+        self.root = root
+        self._hashes: dict[str, str | None] = {}
+        self._imports: dict[str, set[str]] = {}
+
+    def _file(self, module: str) -> Path | None:
+        path = self.root.joinpath(*module.split("."))
+        if (path / "__init__.py").exists():
+            return path / "__init__.py"
+        if path.with_suffix(".py").exists():
+            return path.with_suffix(".py")
+        return None
+
+    def _visit(self, module: str) -> None:
+        if module in self._hashes:
+            return None
+        file = self._file(module)
+        self._hashes[module] = None if file is None else hash_file(file)
+        self._imports[module] = set()
+        if file is None:
+            return None
+        try:
+            tree = ast.parse(file.read_bytes())
+        except SyntaxError:
+            return None
+        is_package = file.name == "__init__.py"
+        self._imports[module] = self._own(_imported_modules(tree, module, is_package))
+
+    def _own(self, names: set[str]) -> set[str]:
+        own = set()
+        for name in names:
+            if name == self.package_name or name.startswith(f"{self.package_name}."):
+                parts = name.split(".")
+                # importing a submodule executes the parent packages
+                own.update(".".join(parts[: i + 1]) for i in range(len(parts)))
+        return own
+
+    def fingerprint(self, cells: list[str]) -> str:
+        if self.package_name is None:
+            return ""
+        names: set[str] = set()
+        for code in cells:
+            names.update(_imported_modules(_parse_cell(code)))
+        todo = list(self._own(names))
+        seen: set[str] = set()
+        while todo:
+            module = todo.pop()
+            if module in seen:
+                continue
+            seen.add(module)
+            self._visit(module)
+            todo.extend(self._imports[module])
+        return hash_bytes(*(f"{m}:{self._hashes[m]}\n".encode() for m in sorted(seen)))
+
+
+def _environment_fingerprint(root: Path) -> str:
+    chunks = [platform.python_version().encode()]
+    for name in LOCKFILES:
+        if (root / name).exists():
+            chunks.append(f"{name}:{hash_file(root / name)}".encode())
+    distributions = sorted(
+        f"{dist.metadata['Name']}=={dist.version}" for dist in metadata.distributions()
+    )
+    chunks.append("\n".join(distributions).encode())
+    return hash_bytes(*chunks)
+
+
+def _parse_cell(code: str) -> ast.AST:
+    try:
+        return ast.parse(code)
+    except SyntaxError:
+        # cells with magics or shell commands, only look at import statements
+        lines = [
+            line.strip()
+            for line in code.splitlines()
+            if line.startswith(("import ", "from "))
+        ]
+        try:
+            return ast.parse("\n".join(lines))
+        except SyntaxError:
+            return ast.parse("")
+
+
+def _code_cells(nb: dict) -> list[str]:
+    return [
+        "".join(cell["source"]) if isinstance(cell["source"], list) else cell["source"]
+        for cell in nb["cells"]
+        if cell["cell_type"] == "code"
+    ]
+
+
+class NotebookCache:
+    """On-disk cache of executed notebooks.
+
+    Notebooks are keyed on the hash of their cell sources, the hashes of the
+    package modules they import and a fingerprint of the environment. Entries
+    are evicted least-recently-used once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        package_name: str | None,
+        root: Path | None = None,
+        max_bytes: int = 1 << 30,
+    ):
+        root = Path.cwd() if root is None else root
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._sources = _PackageSources(package_name, root)
+        self._environment = _environment_fingerprint(root)
+
+    def key(self, notebook: Path) -> str:
+        nb = json.loads(notebook.read_bytes())
+        cells = [(cell["cell_type"], cell["source"]) for cell in nb["cells"]]
+        return hash_bytes(
+            json.dumps(cells).encode(),
+            self._sources.fingerprint(_code_cells(nb)).encode(),
+            self._environment.encode(),
+        )
+
+    def restore(self, notebook: Path, key: str) -> bool:
+        entry = self.directory / f"{key}.ipynb"
+        if not entry.exists():
+            return False
+        shutil.copyfile(entry, notebook)
+        touch(entry)
+        return True
+
+    def store(self, notebook: Path, key: str) -> None:
+        tmp = self.directory / f"{key}.ipynb.tmp"
+        shutil.copyfile(notebook, tmp)
+        tmp.replace(self.directory / f"{key}.ipynb")
+
+    def evict(self) -> list[Path]:
+        return evict(self.directory, max_bytes=self.max_bytes)
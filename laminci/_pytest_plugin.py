@@ -0,0 +1,88 @@
+"""Pytest plugin of `laminci.nox.run_pytest`, enabled with `-p laminci._pytest_plugin`.
+
+Selects the tests affected by a change and the shard of them that this process
+runs, orders them for fast feedback, and records the durations and outcomes of
+the tests it ran.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from ._test_history import TestHistory, balance_shards
+
+if TYPE_CHECKING:
+    import pytest
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("laminci")
+    group.addoption("--laminci-shards", type=int, default=1)
+    group.addoption("--laminci-shard-index", type=int, default=0)
+    group.addoption("--laminci-history", default=None, help="Test history file")
+    group.addoption("--laminci-report", default=None, help="Write results here")
+    group.addoption(
+        "--laminci-changed-files",
+        default=None,
+        help="JSON list of changed files, only run the tests affected by them",
+    )
+    group.addoption(
+        "--laminci-order",
+        default=False,
+        action="store_true",
+        help="Run modules with failures and slow modules first",
+    )
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.pluginmanager.register(LaminciPlugin(config), "laminci-plugin")
+
+
+class LaminciPlugin:
+    def __init__(self, config: pytest.Config):
+        self.config = config
+        self.results: dict[str, dict] = {}
+
+    def pytest_collection_modifyitems(self, items: list[pytest.Item]) -> None:
+        history = TestHistory(self.config.getoption("laminci_history"))
+        nodeids = [item.nodeid for item in items]
+        selected = set(nodeids)
+        changed_files = self.config.getoption("laminci_changed_files")
+        if changed_files is not None:
+            affected = history.affected(
+                nodeids, json.loads(Path(changed_files).read_text())
+            )
+            if affected is not None:
+                selected = affected
+        shards = self.config.getoption("laminci_shards")
+        if shards > 1:
+            # balance the full set so that shards don't depend on the selection
+            shard = balance_shards(nodeids, history.durations(), shards)[
+                self.config.getoption("laminci_shard_index")
+            ]
+            selected &= set(shard)
+        by_nodeid = {item.nodeid: item for item in items}
+        deselected = [item for item in items if item.nodeid not in selected]
+        kept = [nodeid for nodeid in nodeids if nodeid in selected]
+        if self.config.getoption("laminci_order"):
+            kept = history.order(kept)
+        items[:] = [by_nodeid[nodeid] for nodeid in kept]
+        if deselected:
+            self.config.hook.pytest_deselected(items=deselected)
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        result = self.results.setdefault(
+            report.nodeid, {"duration": 0.0, "outcome": "passed"}
+        )
+        result["duration"] += report.duration
+        if report.failed:
+            result["outcome"] = "failed"
+        elif report.skipped and result["outcome"] == "passed":
+            result["outcome"] = "skipped"
+
+    def pytest_sessionfinish(self) -> None:
+        path = self.config.getoption("laminci_report")
+        if path is not None:
+            Path(path).write_text(json.dumps(self.results))
@@ -0,0 +1,124 @@
+"""Git plumbing of the release command.
+
+The repository state is collected with a single `git status` and the release
+commit is pushed together with its tag in one atomic push, so that a rejected
+push can't leave a tag on the remote without its commit or vice versa.
+"""
+
+from __future__ import annotations
+
+import subprocess
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from packaging.version import InvalidVersion, Version
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+RELEASE_PREFIX = "🔖 Release"
+# pre-release suffixes sort before the release they precede
+_VERSIONSORT = [
+    "-c",
+    "versionsort.suffix=a",
+    "-c",
+    "versionsort.suffix=b",
+    "-c",
+    "versionsort.suffix=rc",
+]
+
+
+def _git(*args: str, cwd: str | Path | None = None) -> str:
+    return subprocess.run(
+        ["git", *args], check=True, cwd=cwd, capture_output=True, text=True
+    ).stdout
+
+
+def _run_git(*args: str, cwd: str | Path | None = None) -> None:
+    where = f" (in {cwd})" if cwd is not None else ""
+    print(f"\nrun: git {' '.join(args)}{where}")
+    subprocess.run(["git", *args], check=True, cwd=cwd)
+
+
+def get_last_version_from_tags(cwd: str | Path | None = None) -> str:
+    """Latest version tag, `0.0.0` if there is none."""
+    refs = _git(
+        *_VERSIONSORT,
+        "for-each-ref",
+        "--sort=-v:refname",
+        "--format=%(refname:short)",
+        "refs/tags",
+        cwd=cwd,
+    )
+    for tag in refs.splitlines():
+        try:
+            Version(tag)
+        except InvalidVersion:
+            continue
+        return tag
+    return "0.0.0"
+
+
+@dataclass
+class RepoState:
+    branch: str | None = None
+    upstream: str | None = None
+    staged: list[str] = field(default_factory=list)
+
+
+def read_repo_state(cwd: str | Path | None = None) -> RepoState:
+    """Branch, upstream and staged files from a single `git status`."""
+    output = _git(
+        "status", "--porcelain=v2", "--branch", "--untracked-files=no", "-z", cwd=cwd
+    )
+    state = RepoState()
+    records = iter(output.split("\0"))
+    for record in records:
+        if record.startswith("# branch.head "):
+            head = record.removeprefix("# branch.head ")
+            state.branch = None if head == "(detached)" else head
+        elif record.startswith("# branch.upstream "):
+            state.upstream = record.removeprefix("# branch.upstream ")
+        elif record[:2] in {"1 ", "2 ", "u "}:
+            fields = record.split(" ", {"1": 8, "2": 9, "u": 10}[record[0]])
+            if record[0] == "2":
+                # renames are followed by their original path
+                next(records)
+            if record[0] == "u" or fields[1][0] != ".":
+                state.staged.append(fields[-1])
+    return state
+
+
+def commit_release(version: str, cwd: str | Path | None = None) -> None:
+    message = f"{RELEASE_PREFIX} {version}"
+    _run_git("commit", "-m", message, cwd=cwd)
+    # gitmoji might add a second emoji; ensure message starts with "🔖 Release"
+    subject = _git("log", "-1", "--format=%s", cwd=cwd).strip()
+    if not subject.startswith(RELEASE_PREFIX):
+        _run_git("commit", "--amend", "-m", message, cwd=cwd)
+
+
+def push_release(version: str, state: RepoState, cwd: str | Path | None = None) -> None:
+    """Tag the release commit and push both in one atomic push."""
+    if state.branch is None or state.upstream is None:
+        raise SystemExit(
+            f"Can't push the release, {state.branch or 'HEAD'} has no upstream branch."
+        )
+    remote, branch = state.upstream.split("/", 1)
+    _run_git("tag", version, cwd=cwd)
+    _run_git(
+        "push",
+        "--atomic",
+        remote,
+        f"HEAD:refs/heads/{branch}",
+        f"refs/tags/{version}",
+        cwd=cwd,
+    )
+
+
+def release_commit_and_push(
+    version: str, state: RepoState, cwd: str | Path | None = None
+) -> None:
+    """Commit the staged version bump, tag it and push atomically."""
+    commit_release(version, cwd=cwd)
+    push_release(version, state, cwd=cwd)
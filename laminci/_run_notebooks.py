@@ -1,11 +1,221 @@
 from __future__ import annotations
 
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING
 
+from ._cache import resolve_cache_dir
+from ._env import get_package_name
+from ._notebook_cache import NotebookCache
 
-def run_notebooks(file_or_folder: str | Path):
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+@dataclass
+class NotebookReport:
+    notebook: str
+    seconds: float
+    passed: bool
+    error: str | None = None
+    cached: bool = False
+
+
+def _list_indexed_notebooks(folder: Path) -> list[Path]:
+    """Notebooks in the toctree of `index.md`, or of `<folder>.md` next to it."""
+    index_path = folder / "index.md"
+    if not index_path.exists():
+        index_path = Path(f"{folder.as_posix()}.md")
+    if not index_path.exists():
+        return []
+    index = index_path.read_text()
+    if "```{toctree}" not in index:
+        return []
+    # the entries follow the options of the toctree directive after a blank line
+    toctree = index.split("```{toctree}")[1].split("\n\n")[1].split("```")[0]
+    notebooks = [folder / f"{name}.ipynb" for name in toctree.split()]
+    return [nb for nb in notebooks if nb.exists()]
+
+
+def _collect_notebooks(folder: Path) -> list[Path]:
+    # same order as nbproject_test: indexed in index.md first, then natsorted
+    from natsort import natsorted
+
+    notebooks = _list_indexed_notebooks(folder)
+    unindexed = [nb for nb in folder.glob("./*.ipynb") if nb not in notebooks]
+    notebooks += natsorted(unindexed)
+    return [nb for nb in notebooks if ".ipynb_checkpoints/" not in str(nb)]
+
+
+def _schedule(
+    notebooks: list[Path],
+    sequential: Iterable[Iterable[str]] | None,
+    independent: Iterable[str] | bool = False,
+) -> list[list[Path]]:
+    """Group notebooks into chains, each chain runs in order in a single worker.
+
+    Notebooks that aren't declared sequential or independent form a single chain.
+    """
+    by_stem = {nb.stem: nb for nb in notebooks}
+    chains: list[list[Path]] = []
+    chained: set[str] = set()
+    for group in sequential or []:
+        chain = []
+        for stem in group:
+            if stem not in by_stem:
+                raise ValueError(f"Notebook {stem} in sequential group not found")
+            if stem in chained:
+                raise ValueError(f"Notebook {stem} appears in several groups")
+            chained.add(stem)
+            chain.append(by_stem[stem])
+        if chain:
+            chains.append(chain)
+    if isinstance(independent, bool):
+        independent = by_stem if independent else []
+    for stem in independent:
+        if stem not in by_stem:
+            raise ValueError(f"Independent notebook {stem} not found")
+        if stem not in chained:
+            chained.add(stem)
+            chains.append([by_stem[stem]])
+    rest = [nb for nb in notebooks if nb.stem not in chained]
+    if rest:
+        chains.append(rest)
+    return chains
+
+
+def _execute_chain(chain: list[Path]) -> list[NotebookReport]:
+    # with several workers, runs in a separate process so that the chdir in
+    # nbproject_test doesn't interfere with other workers
     import nbproject_test
 
+    reports = []
+    for i, nb in enumerate(chain):
+        t_start = perf_counter()
+        cwd = Path.cwd()
+        try:
+            nbproject_test.execute_notebooks(nb, write=True)
+        except Exception as e:
+            reports.append(
+                NotebookReport(nb.name, perf_counter() - t_start, False, repr(e))
+            )
+            # later notebooks of a chain depend on this one
+            for skipped in chain[i + 1 :]:
+                reports.append(
+                    NotebookReport(
+                        skipped.name, 0.0, False, f"skipped: {nb.name} failed"
+                    )
+                )
+            break
+        finally:
+            # nbproject_test doesn't restore the working directory on errors
+            os.chdir(cwd)
+        reports.append(NotebookReport(nb.name, perf_counter() - t_start, True))
+    return reports
+
+
+def _print_report(reports: list[NotebookReport], total: float) -> None:
+    print("\nNotebook report:", flush=True)
+    for report in reports:
+        status = "✓" if report.passed else "✗"
+        line = f"{status} {report.notebook} ({report.seconds:.3f}s)"
+        if report.cached:
+            line += " cached"
+        if report.error is not None:
+            line += f" {report.error}"
+        print(line, flush=True)
+    n_passed = sum(report.passed for report in reports)
+    print(f"{n_passed}/{len(reports)} passed, total time: {total:.3f}s", flush=True)
+
+
+def _restore_cached(
+    cache: NotebookCache, chains: list[list[Path]], force: bool
+) -> tuple[list[list[Path]], list[NotebookReport], dict[Path, str]]:
+    # a chain is only skipped if all its notebooks are cached because later
+    # notebooks may depend on side effects of earlier ones
+    keys = {nb: cache.key(nb) for chain in chains for nb in chain}
+    to_run, reports = [], []
+    for chain in chains:
+        if not force and all(
+            (cache.directory / f"{keys[nb]}.ipynb").exists() for nb in chain
+        ):
+            for nb in chain:
+                cache.restore(nb, keys[nb])
+                reports.append(NotebookReport(nb.name, 0.0, True, cached=True))
+        else:
+            to_run.append(chain)
+    return to_run, reports, keys
+
+
+def run_notebooks(
+    file_or_folder: str | Path,
+    workers: int = 1,
+    sequential: Iterable[Iterable[str]] | None = None,
+    independent: Iterable[str] | bool = False,
+    cache_dir: str | Path | None = None,
+    force: bool = False,
+) -> list[NotebookReport] | None:
+    """Execute notebooks.
+
+    Args:
+        file_or_folder: A notebook or a folder with notebooks.
+        workers: Number of worker processes. With `workers=1`, all notebooks of
+            the folder run one after another in the order of `index.md`.
+        sequential: Groups of notebook stems that depend on each other and need
+            to run in the given order, e.g. `[["01-setup", "02-query"]]`.
+        independent: Stems of notebooks that don't depend on any other notebook,
+            `True` for all notebooks that aren't in a sequential group. All other
+            notebooks run one after another in a single chain.
+        cache_dir: Directory of the execution cache, defaults to
+            `$LAMINCI_CACHE_DIR`. Unchanged notebooks aren't executed but
+            restored with their previous outputs. No caching if neither is set.
+        force: Execute all notebooks even if they're cached.
+    """
     path = Path(file_or_folder)
     assert path.exists()
-    nbproject_test.execute_notebooks(path.resolve(), write=True)
+    cache_path = resolve_cache_dir(cache_dir, "notebooks")
+    if cache_path is None and (workers == 1 or path.is_file()):
+        import nbproject_test
+
+        nbproject_test.execute_notebooks(path.resolve(), write=True)
+        return None
+
+    t_start = perf_counter()
+    if path.is_file():
+        notebooks = [path.resolve()]
+    else:
+        notebooks = _collect_notebooks(path.resolve())
+    chains = _schedule(notebooks, sequential, independent)
+    reports: list[NotebookReport] = []
+    if cache_path is not None:
+        cache = NotebookCache(cache_path, get_package_name())
+        chains, reports, keys = _restore_cached(cache, chains, force)
+    print(
+        f"Scheduled {sum(len(c) for c in chains)} notebooks in {len(chains)} chains"
+        f" on {workers} workers",
+        flush=True,
+    )
+    if workers == 1:
+        for chain in chains:
+            reports += _execute_chain(chain)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_execute_chain, chain) for chain in chains]
+            for future in as_completed(futures):
+                reports += future.result()
+    if cache_path is not None:
+        passed = {report.notebook for report in reports if report.passed}
+        for chain in chains:
+            for nb in chain:
+                if nb.name in passed:
+                    cache.store(nb, keys[nb])
+        cache.evict()
+    reports.sort(key=lambda report: report.notebook)
+    _print_report(reports, perf_counter() - t_start)
+    failed = [report.notebook for report in reports if not report.passed]
+    if failed:
+        raise RuntimeError(f"Notebooks failed: {', '.join(failed)}")
+    return reports
@@ -0,0 +1,115 @@
+"""Process-wide cache of secrets from AWS Secrets Manager.
+
+One Secrets Manager client is shared by all calls, and fetched secrets are kept
+in memory for `ttl` seconds.
+
+Set `LAMINCI_SECRETS_KEY` (a random string, e.g. a masked CI variable) to also
+share fetched secrets between processes of a GitHub Actions job. They're written
+to `$RUNNER_TEMP`, which is emptied after each job, and never to the persisted
+`$LAMINCI_CACHE_DIR`. They're encrypted with Fernet from the `cryptography`
+package, and ciphertexts older than `ttl` are rejected.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from ._cache import hash_bytes
+
+SECRETS_KEY_ENV = "LAMINCI_SECRETS_KEY"
+SECRET_TTL = 15 * 60
+
+_lock = threading.Lock()
+_client: Any = None
+_secrets: dict[str, tuple[float, dict]] = {}
+
+
+def _get_client() -> Any:
+    global _client
+    if _client is None:
+        import boto3
+
+        _client = boto3.session.Session().client(
+            service_name="secretsmanager", region_name="us-east-1"
+        )
+    return _client
+
+
+def _fernet() -> Any:
+    key = os.getenv(SECRETS_KEY_ENV)
+    if not key:
+        return None
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        print(f"{SECRETS_KEY_ENV} is set but cryptography isn't installed")
+        return None
+    # any string works as a key, it's stretched to the 32 bytes Fernet expects
+    digest = hashlib.sha256(key.encode()).digest()
+    return Fernet(base64.urlsafe_b64encode(digest))
+
+
+def _disk_path(secret_id: str) -> Path | None:
+    runner_temp = os.getenv("RUNNER_TEMP")
+    if not runner_temp:
+        return None
+    cache_dir = Path(runner_temp) / "laminci-secrets"
+    cache_dir.mkdir(mode=0o700, exist_ok=True)
+    return cache_dir / hash_bytes(secret_id.encode())[:32]
+
+
+def _read_disk(secret_id: str, ttl: float) -> dict | None:
+    fernet = _fernet()
+    path = _disk_path(secret_id) if fernet is not None else None
+    if path is None or not path.exists():
+        return None
+    from cryptography.fernet import InvalidToken
+
+    try:
+        return json.loads(fernet.decrypt(path.read_bytes(), ttl=int(ttl)))
+    except InvalidToken:
+        # expired or encrypted with another key
+        path.unlink(missing_ok=True)
+        return None
+
+
+def _write_disk(secret_id: str, secret: dict) -> None:
+    fernet = _fernet()
+    path = _disk_path(secret_id) if fernet is not None else None
+    if path is None:
+        return None
+    tmp_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(fernet.encrypt(json.dumps(secret).encode()))
+    tmp_path.replace(path)
+
+
+def get_secret(secret_id: str, ttl: float = SECRET_TTL) -> dict:
+    """Secret string of `secret_id` parsed as JSON, cached for `ttl` seconds."""
+    with _lock:
+        cached = _secrets.get(secret_id)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        secret = _read_disk(secret_id, ttl)
+        if secret is None:
+            response = _get_client().get_secret_value(SecretId=secret_id)
+            secret = json.loads(response["SecretString"])
+            _write_disk(secret_id, secret)
+        _secrets[secret_id] = (time.monotonic(), secret)
+        return secret
+
+
+def clear_secret_cache() -> None:
+    """Forget secrets and the client of this process, the disk cache is kept."""
+    global _client
+    with _lock:
+        _secrets.clear()
+        _client = None
@@ -0,0 +1,145 @@
+"""Persistent history of test durations, outcomes and covered source files.
+
+The history is a JSON file, by default in `$LAMINCI_CACHE_DIR/pytest/`, that maps
+pytest node ids to their last outcome, a moving average of their duration and the
+source files they executed according to coverage's per-test contexts.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# weight of the latest run in the moving average of durations
+_ALPHA = 0.5
+
+
+class TestHistory:
+    __test__ = False  # not a test class
+
+    def __init__(self, path: str | Path | None):
+        self.path = Path(path) if path is not None else None
+        self.tests: dict[str, dict] = {}
+        if self.path is not None and self.path.exists():
+            try:
+                self.tests = json.loads(self.path.read_text())["tests"]
+            except (ValueError, KeyError):
+                self.tests = {}
+
+    def durations(self) -> dict[str, float]:
+        return {
+            nodeid: test["duration"]
+            for nodeid, test in self.tests.items()
+            if "duration" in test
+        }
+
+    def update(self, report: dict[str, dict]) -> None:
+        """Merge the results of a run, as written by the laminci pytest plugin."""
+        for nodeid, result in report.items():
+            test = self.tests.setdefault(nodeid, {})
+            if "duration" in test:
+                result["duration"] = (
+                    _ALPHA * result["duration"] + (1 - _ALPHA) * test["duration"]
+                )
+            test.update(result)
+
+    def update_files(self, coverage_json: dict, nodeids: Iterable[str]) -> None:
+        """Record the source files of the tests `nodeids` that ran.
+
+        Source files are taken from the output of `coverage json --show-contexts`.
+        """
+        files: dict[str, set[str]] = {nodeid: set() for nodeid in nodeids}
+        for path, data in coverage_json["files"].items():
+            if Path(path).is_absolute():
+                path = os.path.relpath(path)
+            for contexts in data.get("contexts", {}).values():
+                for context in contexts:
+                    # pytest-cov labels contexts with the node id and the phase
+                    nodeid = context.rpartition("|")[0]
+                    if nodeid:
+                        files.setdefault(nodeid, set()).add(Path(path).as_posix())
+        for nodeid, paths in files.items():
+            self.tests.setdefault(nodeid, {})["files"] = sorted(paths)
+
+    def affected(
+        self, nodeids: list[str], changed_files: Iterable[str]
+    ) -> set[str] | None:
+        """Tests affected by changes to `changed_files`.
+
+        Tests that aren't in the history or failed last time count as affected.
+        Returns `None` if a changed file is neither a recorded source file nor a
+        test module, e.g., a config file; then all tests should run.
+        """
+        sources: dict[str, set[str]] = {}
+        for nodeid, test in self.tests.items():
+            for path in test.get("files", []):
+                sources.setdefault(path, set()).add(nodeid)
+        modules: dict[str, set[str]] = {}
+        for nodeid in nodeids:
+            modules.setdefault(nodeid.split("::")[0], set()).add(nodeid)
+        selected = {
+            nodeid
+            for nodeid in nodeids
+            if "files" not in self.tests.get(nodeid, {})
+            or self.tests[nodeid].get("outcome") == "failed"
+        }
+        for path in changed_files:
+            if path in sources:
+                selected |= sources[path]
+            elif path in modules:
+                selected |= modules[path]
+            else:
+                return None
+        return selected & set(nodeids)
+
+    def order(self, nodeids: list[str]) -> list[str]:
+        """Modules with failures first, then the slowest modules.
+
+        Tests are reordered per module to keep module-scoped fixtures cheap.
+        """
+        modules: dict[str, list[str]] = {}
+        for nodeid in nodeids:
+            modules.setdefault(nodeid.split("::")[0], []).append(nodeid)
+
+        def key(module: str) -> tuple[bool, float]:
+            tests = [self.tests.get(nodeid, {}) for nodeid in modules[module]]
+            failed = any(test.get("outcome") == "failed" for test in tests)
+            return not failed, -sum(test.get("duration", 0.0) for test in tests)
+
+        return [
+            nodeid for module in sorted(modules, key=key) for nodeid in modules[module]
+        ]
+
+    def save(self) -> None:
+        if self.path is None:
+            return None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp{os.getpid()}")
+        tmp_path.write_text(json.dumps({"tests": self.tests}, sort_keys=True))
+        tmp_path.replace(self.path)
+
+
+def balance_shards(
+    nodeids: list[str], durations: dict[str, float], shards: int
+) -> list[list[str]]:
+    """Distribute tests over shards, longest first onto the least loaded shard.
+
+    Tests without a recorded duration count with the median duration. The result
+    only depends on the arguments, so all shards of a run compute the same split
+    as long as they see the same history.
+    """
+    known = sorted(durations[nodeid] for nodeid in nodeids if nodeid in durations)
+    default = known[len(known) // 2] if known else 1.0
+    heap = [(0.0, index) for index in range(shards)]
+    result: list[list[str]] = [[] for _ in range(shards)]
+    for nodeid in sorted(nodeids, key=lambda n: (-durations.get(n, default), n)):
+        load, index = heapq.heappop(heap)
+        result[index].append(nodeid)
+        heapq.heappush(heap, (load + durations.get(nodeid, default), index))
+    return result
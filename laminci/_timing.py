@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def timed(phase: str, timings: dict[str, float]):
+    """Record the wall time of the block as `timings[phase]`."""
+    t_start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = time.perf_counter() - t_start
+
+
+def format_timings(timings: dict[str, float]) -> str:
+    return ", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in timings.items())
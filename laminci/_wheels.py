@@ -0,0 +1,176 @@
+"""Inspection of built wheels.
+
+A wheel's central directory is read once. Package presence and the size budget
+are answered from it; `METADATA` and `RECORD` are only decompressed by the
+checks that need them.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import Parser
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
+from packaging.version import Version
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r"[-_.]+", "_", name).lower()
+
+
+def wheel_filename(name: str, version: str) -> str:
+    """Filename of a pure-Python wheel as built by flit."""
+    return f"{_normalize_name(name)}-{Version(version)}-py3-none-any.whl"
+
+
+def sdist_filename(name: str, version: str) -> str:
+    return f"{_normalize_name(name)}-{Version(version)}.tar.gz"
+
+
+class WheelInspector:
+    """Answer questions about a wheel from a single read of its central directory."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._zf = zipfile.ZipFile(self.path)
+        self.sizes = {
+            info.filename: info.file_size
+            for info in self._zf.infolist()
+            if not info.is_dir()
+        }
+        self.compressed_size = self.path.stat().st_size
+        dist_info = {
+            name.split("/", 1)[0]
+            for name in self.sizes
+            if name.split("/", 1)[0].endswith(".dist-info")
+        }
+        if len(dist_info) != 1:
+            self._zf.close()
+            raise ValueError(f"{self.path.name} has no unique .dist-info directory")
+        self.dist_info = dist_info.pop()
+
+    def __enter__(self) -> WheelInspector:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._zf.close()
+
+    def _read(self, name: str) -> str:
+        return self._zf.read(f"{self.dist_info}/{name}").decode()
+
+    def has_package(self, package: str) -> bool:
+        prefix = f"{package.replace('.', '/')}/"
+        return any(name.startswith(prefix) for name in self.sizes)
+
+    @cached_property
+    def requires_dist(self) -> list[Requirement]:
+        metadata = Parser().parsestr(self._read("METADATA"), headersonly=True)
+        return [Requirement(value) for value in metadata.get_all("Requires-Dist", [])]
+
+    def has_requirement(self, requirement: str) -> bool:
+        """Whether `Requires-Dist` contains `requirement`, extras may be a superset."""
+        expected = Requirement(requirement)
+        name = canonicalize_name(expected.name)
+        return any(
+            canonicalize_name(actual.name) == name
+            and expected.extras <= actual.extras
+            and actual.specifier == expected.specifier
+            for actual in self.requires_dist
+        )
+
+    def record_errors(self) -> list[str]:
+        """Mismatches between `RECORD` and the archive in names and sizes."""
+        record_name = f"{self.dist_info}/RECORD"
+        recorded = {}
+        for row in csv.reader(io.StringIO(self._read("RECORD"))):
+            if row:
+                recorded[row[0]] = row[2] if len(row) > 2 else ""
+        errors = []
+        for name, size in self.sizes.items():
+            if name == record_name:
+                continue
+            if name not in recorded:
+                errors.append(f"{name} is not listed in RECORD")
+            elif recorded[name] and int(recorded[name]) != size:
+                errors.append(f"{name} has size {size}, RECORD lists {recorded[name]}")
+        errors.extend(
+            f"{name} is listed in RECORD but missing"
+            for name in recorded
+            if name not in self.sizes
+        )
+        return errors
+
+
+def inspect_wheel(
+    path: str | Path,
+    *,
+    packages: Iterable[str] = (),
+    forbidden_packages: Iterable[str] = (),
+    requirements: Iterable[str] = (),
+    max_bytes: int | None = None,
+    check_record: bool = True,
+) -> list[str]:
+    """Check a wheel, return a list of problems.
+
+    Checks that only need the central directory run first, `METADATA` and
+    `RECORD` are read only if these pass.
+    """
+    with WheelInspector(path) as wheel:
+        problems = []
+        if max_bytes is not None and wheel.compressed_size > max_bytes:
+            problems.append(
+                f"{wheel.path.name} has {wheel.compressed_size} bytes, the budget is"
+                f" {max_bytes} bytes"
+            )
+        problems.extend(
+            f"{wheel.path.name} does not contain {package}/ package"
+            for package in packages
+            if not wheel.has_package(package)
+        )
+        problems.extend(
+            f"{wheel.path.name} unexpectedly contains {package}/ package"
+            for package in forbidden_packages
+            if wheel.has_package(package)
+        )
+        if problems:
+            return problems
+        problems.extend(
+            f"{wheel.path.name} does not require {requirement}"
+            for requirement in requirements
+            if not wheel.has_requirement(requirement)
+        )
+        if check_record:
+            problems.extend(
+                f"{wheel.path.name}: {error}" for error in wheel.record_errors()
+            )
+        return problems
+
+
+def inspect_wheels(
+    checks: dict[Path, dict], workers: int | None = None
+) -> dict[Path, list[str]]:
+    """Run `inspect_wheel` for several wheels in parallel.
+
+    `checks` maps wheel paths to the keyword arguments of `inspect_wheel`, pass
+    a directory's `*.whl` files with the same checks to inspect all of them.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            path: executor.submit(inspect_wheel, path, **kwargs)
+            for path, kwargs in checks.items()
+        }
+        return {path: future.result() for path, future in futures.items()}
@@ -0,0 +1,221 @@
+"""Minimal streaming zip writer.
+
+In contrast to `zipfile`, members are compressed independently of the archive so
+that compression can run in a thread pool (`zlib` releases the GIL) while the
+archive is written sequentially to any writable stream, e.g. a pipe.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+STORED = 0
+DEFLATED = 8
+# formats that are already compressed, deflating them again only costs time
+STORED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".zip", ".gz"}
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_UTF8_FLAG = 0x800
+_VERSION = 20
+_MADE_BY_UNIX = (3 << 8) | _VERSION
+_MAX_32 = 0xFFFFFFFF
+_MAX_ENTRIES = 0xFFFF
+
+
+def _dos_datetime(mtime: float) -> tuple[int, int]:
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+@dataclass
+class ZipEntry:
+    """Metadata of a zip member, everything except its compressed bytes."""
+
+    arcname: str
+    crc: int
+    size: int
+    compressed_size: int
+    method: int
+    dos_time: int
+    dos_date: int
+    mode: int
+
+    def local_header(self) -> bytes:
+        name = self.arcname.encode()
+        return (
+            _LOCAL_HEADER.pack(
+                b"PK\x03\x04",
+                _VERSION,
+                _UTF8_FLAG,
+                self.method,
+                self.dos_time,
+                self.dos_date,
+                self.crc,
+                self.compressed_size,
+                self.size,
+                len(name),
+                0,
+            )
+            + name
+        )
+
+    def central_header(self, offset: int) -> bytes:
+        name = self.arcname.encode()
+        return (
+            _CENTRAL_HEADER.pack(
+                b"PK\x01\x02",
+                _MADE_BY_UNIX,
+                _VERSION,
+                _UTF8_FLAG,
+                self.method,
+                self.dos_time,
+                self.dos_date,
+                self.crc,
+                self.compressed_size,
+                self.size,
+                len(name),
+                0,
+                0,
+                0,
+                0,
+                self.mode << 16,
+                offset,
+            )
+            + name
+        )
+
+
+def compress_file(
+    path: str | Path, arcname: str, level: int = 6
+) -> tuple[ZipEntry, bytes]:
+    """Read and compress a file, store it if it's already compressed."""
+    stat = Path(path).stat()
+    with open(path, "rb") as f:
+        raw = f.read()
+    if Path(arcname).suffix.lower() in STORED_SUFFIXES:
+        method, data = STORED, raw
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        method, data = DEFLATED, compressor.compress(raw) + compressor.flush()
+    dos_time, dos_date = _dos_datetime(stat.st_mtime)
+    entry = ZipEntry(
+        arcname=arcname,
+        crc=zlib.crc32(raw),
+        size=len(raw),
+        compressed_size=len(data),
+        method=method,
+        dos_time=dos_time,
+        dos_date=dos_date,
+        mode=stat.st_mode & 0xFFFF,
+    )
+    return entry, data
+
+
+class ZipStreamWriter:
+    """Write a zip archive sequentially to a (non-seekable) binary stream."""
+
+    def __init__(self, fileobj: BinaryIO):
+        self._fileobj = fileobj
+        self.offset = 0
+        self.entries: list[tuple[ZipEntry, int]] = []
+
+    def _write(self, data: bytes) -> None:
+        self._fileobj.write(data)
+        self.offset += len(data)
+
+    def _check_limits(self, entry: ZipEntry, length: int) -> None:
+        # without zip64 records, sizes and offsets have 32 bits and the number of
+        # members 16 bits; check before writing instead of producing a corrupt file
+        if len(self.entries) >= _MAX_ENTRIES:
+            raise ValueError(
+                f"Archive has more than {_MAX_ENTRIES} members, zip64 is not supported"
+            )
+        if max(self.offset + length, entry.size, entry.compressed_size) > _MAX_32:
+            raise ValueError("Archive exceeds 4 GiB, zip64 is not supported")
+
+    def write(self, entry: ZipEntry, data: bytes) -> tuple[int, int]:
+        """Write a member, return offset and length of its local record."""
+        offset = self.offset
+        header = entry.local_header()
+        self._check_limits(entry, len(header) + len(data))
+        self._write(header)
+        self._write(data)
+        self.entries.append((entry, offset))
+        return offset, self.offset - offset
+
+    def record(self, entry: ZipEntry, length: int) -> int:
+        """Account for a member whose local record was written by the caller."""
+        self._check_limits(entry, length)
+        offset = self.offset
+        self.offset += length
+        self.entries.append((entry, offset))
+        return offset
+
+    def close(self) -> None:
+        start = self.offset
+        central_directory = b"".join(
+            entry.central_header(offset) for entry, offset in self.entries
+        )
+        if start + len(central_directory) > _MAX_32:
+            raise ValueError("Archive exceeds 4 GiB, zip64 is not supported")
+        self._write(central_directory)
+        self._write(
+            _END_RECORD.pack(
+                b"PK\x05\x06",
+                0,
+                0,
+                len(self.entries),
+                len(self.entries),
+                self.offset - start,
+                start,
+                0,
+            )
+        )
+        self._fileobj.flush()
+
+
+def compress_files(
+    files: Iterable[tuple[str | Path, str]], workers: int | None = None
+) -> Iterator[tuple[ZipEntry, bytes]]:
+    """Compress files in a thread pool, yield them in order.
+
+    At most a few members per worker are held in memory at a time.
+    """
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: deque = deque()
+        for path, arcname in files:
+            pending.append(executor.submit(compress_file, path, arcname))
+            if len(pending) >= 4 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def write_zip(
+    fileobj: BinaryIO,
+    files: Iterable[tuple[str | Path, str]],
+    workers: int | None = None,
+) -> ZipStreamWriter:
+    writer = ZipStreamWriter(fileobj)
+    for entry, data in compress_files(files, workers=workers):
+        writer.write(entry, data)
+    writer.close()
+    return writer
@@ -1,4 +1,9 @@
-from ._db import setup_local_test_postgres, setup_local_test_sqlite_file  # noqa
+from ._db import (  # noqa
+    setup_local_test_postgres,
+    setup_local_test_postgres_instances,
+    setup_local_test_sqlite_file,
+    teardown_local_test_postgres,
+)
 
 # backward compat below
 setup_local_test_postgres_supabase = None
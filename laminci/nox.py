@@ -1,7 +1,13 @@
 import json
 import os
 import shlex
-from collections.abc import Iterable
+import shutil
+import subprocess
+import tempfile
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Literal, Optional, Union
 
@@ -9,27 +15,32 @@ import nox
 from nox import Session
 
 from . import _nox_logger  # noqa the import statement silences the logger
+from ._cache import evict, publish_dir, resolve_cache_dir, touch
 from ._env import get_package_name
+from ._test_history import TestHistory
+from ._timing import format_timings, timed
 
 SYSTEM = " --system " if os.getenv("CI") else ""
 nox.options.default_venv_backend = "none"
 
 
+INTERNAL_SECRETS_ARN = (
+    "arn:aws:secretsmanager:us-east-1:586130067823:secret:laminlabs-internal-sZj1MU"
+)
+
+
+def _get_internal_secrets() -> dict:
+    from ._secrets import get_secret
+
+    return get_secret(INTERNAL_SECRETS_ARN)
+
+
 def _login_lamin_user(handle: str, env: Optional[dict[str, str]] = None):
-    import boto3
     import lamindb_setup as ln_setup
 
     if env is not None:
         os.environ.update(env)
-    session = boto3.session.Session()
-    client = session.client(
-        service_name="secretsmanager",
-        region_name="us-east-1",
-    )
-    arn = (
-        "arn:aws:secretsmanager:us-east-1:586130067823:secret:laminlabs-internal-sZj1MU"
-    )
-    secrets = json.loads(client.get_secret_value(SecretId=arn)["SecretString"])
+    secrets = _get_internal_secrets()
     suffix = "_STAGING" if os.getenv("LAMIN_ENV", "prod") == "staging" else ""
     if handle == "testuser1":
         ln_setup.login(api_key=secrets[f"LAMIN_TESTUSER1_API_KEY{suffix}"])
@@ -61,18 +72,167 @@ def run_pre_commit(session: Session):
     session.run("pre-commit", "run", "--all-files")
 
 
-def run_pytest(session: Session, coverage: bool = True, env: Optional[dict] = None):
-    package_name = get_package_name()
-    coverage_args = (
-        f"--cov={package_name} --cov-append --cov-report=term-missing".split()
+def _run_pytest_workers(
+    session: Session,
+    args: list[str],
+    env: Optional[dict],
+    shards: int,
+    shard_index: int,
+    workers: int,
+    report_dir: Path,
+) -> list[Path]:
+    processes = []
+    for worker in range(workers):
+        worker_env = {
+            **os.environ,
+            **(env or {}),
+            # each worker writes its own coverage data, they're combined afterwards
+            "COVERAGE_FILE": f".coverage.laminci.{worker}",
+            # not PYTEST_XDIST_WORKER, plugins would assume they run under xdist
+            "LAMINCI_TEST_WORKER": f"gw{worker}",
+            "LAMINCI_TEST_WORKER_COUNT": str(workers),
+        }
+        command = [
+            "pytest",
+            "-s",
+            *args,
+            "--cov-report=",
+            "--laminci-shards",
+            str(shards * workers),
+            "--laminci-shard-index",
+            str(shard_index * workers + worker),
+            "--laminci-report",
+            str(report_dir / f"{worker}.json"),
+        ]
+        session.log(" ".join(command))
+        processes.append(subprocess.Popen(command, env=worker_env))
+    returncodes = [process.wait() for process in processes]
+    # pytest exits with 5 if a worker got no tests
+    if any(code not in {0, 5} for code in returncodes):
+        session.error(f"pytest workers failed with exit codes {returncodes}")
+    return [report_dir / f"{worker}.json" for worker in range(workers)]
+
+
+def _changed_files() -> Optional[list[str]]:
+    """Files changed by a pull request, `None` if not in a pull request."""
+    base_ref = os.getenv("GITHUB_BASE_REF")
+    if os.getenv("GITHUB_EVENT_NAME") != "pull_request" or not base_ref:
+        return None
+    # shallow checkouts don't have the base branch
+    subprocess.run(
+        ["git", "fetch", "--quiet", "--depth=50", "origin", base_ref],
+        capture_output=True,
     )
-    session.run(
-        "pytest",
-        "-s",
-        "tests/",
-        *coverage_args,
-        env=env,
+    result = subprocess.run(
+        ["git", "diff", "--name-only", f"origin/{base_ref}...HEAD"],
+        capture_output=True,
+        text=True,
     )
+    if result.returncode != 0:
+        return None
+    return result.stdout.split()
+
+
+def run_pytest(
+    session: Session,
+    coverage: bool = True,
+    env: Optional[dict] = None,
+    shards: int = 1,
+    shard_index: int = 0,
+    workers: int = 1,
+    history_file: Optional[Union[str, Path]] = None,
+    affected_only: bool = False,
+):
+    """Run the tests with coverage.
+
+    Args:
+        session: The nox session.
+        coverage: Whether to write `coverage.xml`.
+        env: Environment variables for pytest.
+        shards: Split the tests into this many shards, e.g., CI matrix jobs.
+        shard_index: The shard to run in this job.
+        workers: Split the shard further across this many pytest processes. They
+            get `LAMINCI_TEST_WORKER` set to `gw0`, `gw1`, ... to isolate resources.
+        history_file: Test history used to balance shards, by default in
+            `$LAMINCI_CACHE_DIR/pytest/`. All shards need to see the same history.
+        affected_only: In pull requests, only run the tests affected by the changed
+            files according to the history. Pushes, e.g., to main, run all tests.
+
+    With a history, modules with failures and slow modules run first.
+    """
+    package_name = get_package_name()
+    if history_file is None:
+        cache_dir = resolve_cache_dir(None, "pytest")
+        if cache_dir is not None:
+            history_file = cache_dir / f"{package_name}.json"
+    history = TestHistory(history_file)
+    args = ["tests/", f"--cov={package_name}", "-p", "laminci._pytest_plugin"]
+    if history_file is not None:
+        # per-test contexts record which source files each test executes
+        args += ["--laminci-history", str(history_file), "--laminci-order"]
+        args.append("--cov-context=test")
+    with tempfile.TemporaryDirectory() as report_dir:
+        changed_files = None
+        if history_file is not None and affected_only:
+            changed_files = _changed_files()
+        if changed_files is not None:
+            changed_file = Path(report_dir) / "changed.json"
+            changed_file.write_text(json.dumps(changed_files))
+            args += ["--laminci-changed-files", str(changed_file)]
+        selective = changed_files is not None or shards > 1
+        reports = [Path(report_dir) / "0.json"]
+        try:
+            if workers > 1:
+                reports = _run_pytest_workers(
+                    session, args, env, shards, shard_index, workers, Path(report_dir)
+                )
+                # a worker that crashed or got no tests may not have written data
+                data_files = [
+                    data_file
+                    for worker in range(workers)
+                    if Path(data_file := f".coverage.laminci.{worker}").exists()
+                ]
+                if data_files:
+                    session.run("coverage", "combine", "--append", *data_files)
+                    session.run("coverage", "report", "--show-missing")
+            else:
+                session.run(
+                    "pytest",
+                    "-s",
+                    *args,
+                    "--cov-append",
+                    "--cov-report=term-missing",
+                    "--laminci-shards",
+                    str(shards),
+                    "--laminci-shard-index",
+                    str(shard_index),
+                    "--laminci-report",
+                    str(reports[0]),
+                    env=env,
+                    # pytest exits with 5 if no tests were selected
+                    success_codes=[0, 5] if selective else [0],
+                )
+        finally:
+            ran = []
+            for report in reports:
+                if report.exists():
+                    results = json.loads(report.read_text())
+                    history.update(results)
+                    ran += results
+            if history_file is not None and ran:
+                coverage_json = Path(report_dir) / "coverage.json"
+                session.run(
+                    "coverage",
+                    "json",
+                    "--quiet",
+                    "--show-contexts",
+                    "-o",
+                    str(coverage_json),
+                    success_codes=[0, 1],
+                )
+                if coverage_json.exists():
+                    history.update_files(json.loads(coverage_json.read_text()), ran)
+            history.save()
     if coverage:
         session.run("coverage", "xml")
 
@@ -92,52 +252,287 @@ def build_docs(session: Session, strict: bool = False, strip_prefix: bool = Fals
     session.run(*args)
 
 
-def install_lamindb(
-    session: Session,
-    branch: Literal["release", "main"],
-    extras: Optional[Union[Iterable[str], str]] = None,
-    target_dir: str = "lamindb",
-):
+LAMINDB_URL = "https://github.com/laminlabs/lamindb"
+LAMINDB_SUBMODULES = ["lamindb-setup", "lamin-cli", "bionty", "pertdb"]
+
+
+def _extras_str(extras: Optional[Union[Iterable[str], str]]) -> str:
     if extras is None:
-        extras_str = "[full]"
+        return "[full]"
     elif isinstance(extras, str):
         if extras == "":
-            extras_str = ""
-        else:
-            assert "[" not in extras and "]" not in extras
-            extras_str = f"[{extras}]"
+            return ""
+        assert "[" not in extras and "]" not in extras
+        return f"[{extras}]"
     else:
-        extras_str = f"[{','.join(extras)}]"
+        return f"[{','.join(extras)}]"
+
+
+def _resolve_lamindb_sha(session: Session, branch: str) -> str:
+    output = session.run(
+        "git", "ls-remote", LAMINDB_URL, f"refs/heads/{branch}", silent=True
+    )
+    if not output:
+        raise ValueError(f"Branch {branch} doesn't exist in {LAMINDB_URL}")
+    return output.split()[0]
+
 
+def _update_lamindb_mirror(session: Session, mirror: Path, branch: str, sha: str):
+    if not mirror.exists():
+        # not --mirror, which also fetches the refs/pull/* of all pull requests
+        session.run("git", "clone", "--bare", "--quiet", LAMINDB_URL, str(mirror))
+        session.run(
+            "git",
+            "-C",
+            str(mirror),
+            "config",
+            "remote.origin.fetch",
+            "+refs/heads/*:refs/heads/*",
+        )
+        return None
+    has_commit = subprocess.run(
+        ["git", "-C", str(mirror), "cat-file", "-e", f"{sha}^{{commit}}"],
+        capture_output=True,
+    )
+    if has_commit.returncode == 0:
+        return None
+    # only fetches the commits that aren't in the mirror yet
+    session.run(
+        "git",
+        "-C",
+        str(mirror),
+        "fetch",
+        "--quiet",
+        "origin",
+        f"+refs/heads/{branch}:refs/heads/{branch}",
+    )
+
+
+def _clone_lamindb(
+    session: Session,
+    branch: str,
+    target_dir: str,
+    mirror: Optional[Path] = None,
+    sha: Optional[str] = None,
+):
+    """Clone lamindb without its submodules."""
+    if mirror is None:
+        session.run(
+            "git", "clone", "-b", branch, "--depth", "1", LAMINDB_URL, target_dir
+        )
+        return None
     session.run(
         "git",
         "clone",
+        "--reference",
+        str(mirror),
         "-b",
         branch,
+        LAMINDB_URL,
+        target_dir,
+    )
+    if sha is not None:
+        session.run("git", "-C", target_dir, "checkout", "--quiet", "--detach", sha)
+
+
+def _update_lamindb_submodules(session: Session, target_dir: str):
+    session.run(
+        "git",
+        "-C",
+        target_dir,
+        "submodule",
+        "update",
+        "--init",
+        "--recursive",
         "--depth",
         "1",
-        "--recursive",
-        "--shallow-submodules",
-        "https://github.com/laminlabs/lamindb",
-        target_dir,
+        "--jobs",
+        str(len(LAMINDB_SUBMODULES)),
     )
-    if branch != "release":
-        session.run(
+
+
+@contextmanager
+def _warm_lamindb_resolution(
+    target_dir: str, extras_str: str
+) -> Iterator[subprocess.Popen]:
+    """Resolve the dependencies in the background to fill uv's cache.
+
+    Only needs `pyproject.toml`, so it overlaps with fetching the submodules and
+    building wheels; the final install then finds all metadata in the cache. The
+    process is killed if it's still running when the block exits.
+    """
+    extras = [
+        arg
+        for extra in extras_str.strip("[]").split(",")
+        if extra
+        for arg in ("--extra", extra)
+    ]
+    process = subprocess.Popen(
+        [
             "uv",
             "pip",
-            "install",
+            "compile",
+            "--quiet",
             "--system",
-            "--no-deps",
-            f"./{target_dir}/sub/lamindb-setup",
-            f"./{target_dir}/sub/lamin-cli",
-            f"./{target_dir}/sub/bionty",
-            f"./{target_dir}/sub/pertdb",
+            "--prerelease=allow",
+            *extras,
+            "--output-file",
+            os.devnull,
+            f"{target_dir}/pyproject.toml",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        yield process
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+
+def _build_lamindb_wheels(
+    session: Session, branch: str, target_dir: str, wheel_dir: Path
+):
+    sources = [("package", f"./{target_dir}")]
+    if branch != "release":
+        sources += [
+            ("sub", f"./{target_dir}/sub/{name}") for name in LAMINDB_SUBMODULES
+        ]
+    # the builds are independent of each other
+    with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+        futures = [
+            executor.submit(
+                session.run,
+                "uv",
+                "build",
+                "--wheel",
+                "--out-dir",
+                str(wheel_dir / kind),
+                path,
+            )
+            for kind, path in sources
+        ]
+        for future in futures:
+            future.result()
+
+
+def _record_install_cache_stats(cache_dir: Path, hit: bool) -> dict:
+    stats_file = cache_dir / "stats.json"
+    try:
+        stats = json.loads(stats_file.read_text())
+    except (FileNotFoundError, ValueError):
+        stats = {"hits": 0, "misses": 0}
+    stats["hits" if hit else "misses"] += 1
+    stats_file.write_text(json.dumps(stats))
+    return stats
+
+
+def _install_lamindb_cached(
+    session: Session,
+    branch: str,
+    extras_str: str,
+    target_dir: str,
+    cache_dir: Path,
+    timings: dict[str, float],
+):
+    with timed("resolve commit", timings):
+        sha = _resolve_lamindb_sha(session, branch)
+    mirror = cache_dir / "mirror.git"
+    builds_dir = cache_dir / "builds"
+    builds_dir.mkdir(exist_ok=True)
+    # wheels don't depend on the extras, these only change what's installed
+    wheel_dir = builds_dir / (sha if branch != "release" else f"{sha}-release")
+    hit = wheel_dir.exists()
+    with timed("clone", timings):
+        _update_lamindb_mirror(session, mirror, branch, sha)
+        _clone_lamindb(session, branch, target_dir, mirror=mirror, sha=sha)
+    with _warm_lamindb_resolution(target_dir, extras_str) as warmup:
+        if hit:
+            # the submodules are only needed to build their wheels
+            touch(wheel_dir)
+        else:
+            with timed("submodules", timings):
+                _update_lamindb_submodules(session, target_dir)
+            with timed("build wheels", timings):
+                tmp_dir = builds_dir / f"{wheel_dir.name}.tmp{os.getpid()}"
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                _build_lamindb_wheels(session, branch, target_dir, tmp_dir)
+                publish_dir(tmp_dir, wheel_dir)
+            evict(builds_dir, max_bytes=2 * 1024**3, max_age=7 * 24 * 3600)
+        with timed("install", timings):
+            submodule_wheels = sorted(map(str, wheel_dir.glob("sub/*.whl")))
+            if submodule_wheels:
+                session.run(
+                    "uv", "pip", "install", "--system", "--no-deps", *submodule_wheels
+                )
+            (wheel,) = wheel_dir.glob("package/*.whl")
+            # the distribution name is the first component of the wheel filename
+            name = wheel.name.split("-")[0]
+            warmup.wait()
+            session.run(
+                "uv",
+                "pip",
+                "install",
+                "--system",
+                "--prerelease=allow",
+                f"{name}{extras_str} @ {wheel.resolve().as_uri()}",
+            )
+    stats = _record_install_cache_stats(cache_dir, hit)
+    print(
+        f"lamindb install cache {'hit' if hit else 'miss'} for {branch}@{sha[:8]}"
+        f"{extras_str} ({stats['hits']} hits, {stats['misses']} misses)"
+    )
+
+
+def install_lamindb(
+    session: Session,
+    branch: Literal["release", "main"],
+    extras: Optional[Union[Iterable[str], str]] = None,
+    target_dir: str = "lamindb",
+):
+    """Install lamindb from its `branch`, with submodules unless it's `release`.
+
+    If `LAMINCI_CACHE_DIR` is set, lamindb is cloned from a persistent mirror and
+    wheels built for the resolved commit are reused across sessions. When the
+    wheels are reused, the submodules in `target_dir` aren't checked out.
+    """
+    extras_str = _extras_str(extras)
+    timings: dict[str, float] = {}
+    t_start = time.perf_counter()
+    cache_dir = resolve_cache_dir(None, "lamindb-install")
+    if cache_dir is not None:
+        _install_lamindb_cached(
+            session, branch, extras_str, target_dir, cache_dir, timings
         )
-    session.run(
-        "uv",
-        "pip",
-        "install",
-        "--system",
-        "--prerelease=allow",
-        f"./{target_dir}{extras_str}",
+    else:
+        with timed("clone", timings):
+            _clone_lamindb(session, branch, target_dir)
+        with _warm_lamindb_resolution(target_dir, extras_str) as warmup:
+            with timed("submodules", timings):
+                _update_lamindb_submodules(session, target_dir)
+            if branch != "release":
+                with timed("install submodules", timings):
+                    # uv builds the local packages in parallel
+                    session.run(
+                        "uv",
+                        "pip",
+                        "install",
+                        "--system",
+                        "--no-deps",
+                        *[f"./{target_dir}/sub/{name}" for name in LAMINDB_SUBMODULES],
+                    )
+            with timed("install", timings):
+                warmup.wait()
+                session.run(
+                    "uv",
+                    "pip",
+                    "install",
+                    "--system",
+                    "--prerelease=allow",
+                    f"./{target_dir}{extras_str}",
+                )
+    print(
+        f"lamindb install timings: {format_timings(timings)}"
+        f" (total {time.perf_counter() - t_start:.1f}s)"
     )
@@ -12,7 +12,7 @@ def lint(session: nox.Session) -> None:
 
 @nox.session
 def build(session):
-    session.run(*"pip install .[dev]".split())
+    session.run(*"pip install .[dev,doc-changes,run-notebooks]".split())
     session.run(
         "pytest",
         "-s",
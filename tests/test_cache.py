@@ -0,0 +1,37 @@
+import os
+
+from laminci._cache import clone_tree, evict, publish_dir
+
+
+def test_evict_lru(tmp_path):
+    for i, name in enumerate(["old", "mid", "new"]):
+        (tmp_path / name).write_bytes(b"x" * 10)
+        os.utime(tmp_path / name, (1000 + i, 1000 + i))
+    evicted = evict(tmp_path, max_bytes=20)
+    assert [p.name for p in evicted] == ["old"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["mid", "new"]
+    evicted = evict(tmp_path, max_age=60)
+    assert not list(tmp_path.iterdir())
+
+
+def test_clone_tree_hardlinks(tmp_path):
+    src = tmp_path / "src"
+    (src / "bin").mkdir(parents=True)
+    (src / "bin" / "python").write_text("x")
+    (src / "python3").symlink_to("bin/python")
+    clone_tree(src, tmp_path / "dst")
+    assert (tmp_path / "dst" / "bin" / "python").stat().st_ino == (
+        src / "bin" / "python"
+    ).stat().st_ino
+    assert (tmp_path / "dst" / "python3").readlink().as_posix() == "bin/python"
+
+
+def test_publish_dir_concurrent(tmp_path):
+    for name in ["tmp1", "tmp2"]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "file").write_text(name)
+    assert publish_dir(tmp_path / "tmp1", tmp_path / "entry")
+    # a second creator of the same entry loses the race and reuses the first
+    assert not publish_dir(tmp_path / "tmp2", tmp_path / "entry")
+    assert not (tmp_path / "tmp2").exists()
+    assert (tmp_path / "entry" / "file").read_text() == "tmp1"
@@ -0,0 +1,254 @@
+import os
+import subprocess
+
+import pytest
+from laminci._doc_changes import (
+    Settings,
+    TemplateDataPR,
+    TemplateDataUser,
+    clone_sparse,
+    generate_content,
+)
+
+USER = "[@falexwolf](https://github.com/falexwolf)"
+CHANGELOG = f"""# Changelog
+
+#### Features
+
+- Add a feature [PR](https://github.com/laminlabs/lamindb/pull/1) {USER}
+
+## 2025
+
+- Old entry [PR](https://github.com/laminlabs/lamindb/pull/0) {USER}
+"""
+# output of the original, regex-based implementation
+EXPECTED = f"""# Changelog
+
+#### Features
+
+- Another feature [PR](https://github.com/laminlabs/lamindb/pull/3) {USER}
+- Add a feature [PR](https://github.com/laminlabs/lamindb/pull/1) {USER}
+
+#### Fixes
+
+- Fix a bug [PR](https://github.com/laminlabs/lamindb/pull/2) {USER}
+
+## 2025
+
+- Old entry [PR](https://github.com/laminlabs/lamindb/pull/0) {USER}
+"""
+
+
+def _pr(number: int, title: str) -> TemplateDataPR:
+    return TemplateDataPR(
+        number=number,
+        title=title,
+        html_url=f"https://github.com/laminlabs/lamindb/pull/{number}",
+        user=TemplateDataUser(
+            login="falexwolf", html_url="https://github.com/falexwolf"
+        ),
+    )
+
+
+@pytest.fixture
+def settings():
+    return Settings(
+        github_repository="laminlabs/lamindb",
+        github_event_path="event.json",
+        repo_token="token",  # noqa: S106
+    )
+
+
+def test_generate_content(settings):
+    content = generate_content(
+        content=CHANGELOG, settings=settings, pr=_pr(2, "Fix a bug"), labels=["bug"]
+    )
+    content = generate_content(
+        content=content,
+        settings=settings,
+        pr=_pr(3, "Another feature"),
+        labels=["feature", "docs"],
+    )
+    assert content == EXPECTED
+    with pytest.raises(RuntimeError):
+        generate_content(
+            content=content, settings=settings, pr=_pr(2, "Fix a bug"), labels=[]
+        )
+
+
+def test_generate_content_batch(settings):
+    prs = [
+        (_pr(2, "Fix a bug"), ["bug"]),
+        (_pr(1, "Add a feature"), ["feature"]),  # already added
+        (_pr(3, "Another feature"), ["feature", "docs"]),
+    ]
+    assert generate_content(content=CHANGELOG, settings=settings, prs=prs) == EXPECTED
+
+
+def _git(*args, cwd=None):
+    subprocess.run(["git", *args], check=True, cwd=cwd, capture_output=True)
+
+
+def test_clone_sparse(tmp_path):
+    # local bare repo standing in for lamin-docs on GitHub
+    work = tmp_path / "work"
+    (work / "docs").mkdir(parents=True)
+    (work / "images").mkdir()
+    (work / "docs" / "changelog.md").write_text(CHANGELOG)
+    (work / "images" / "large.png").write_bytes(os.urandom(1024**2))
+    _git("init", "-q", "-b", "main", cwd=work)
+    _git("add", ".", cwd=work)
+    _git("-c", "user.name=x", "-c", "user.email=x@x", "commit", "-qm", "init", cwd=work)
+    remote = tmp_path / "lamin-docs.git"
+    _git("clone", "-q", "--bare", str(work), str(remote))
+    _git("config", "uploadpack.allowFilter", "true", cwd=remote)
+    url = f"file://{remote}"
+
+    stats = clone_sparse(url, tmp_path / "clone", "docs")
+    assert (tmp_path / "clone" / "docs" / "changelog.md").read_text() == CHANGELOG
+    assert not (tmp_path / "clone" / "images").exists()
+    assert stats["bytes"] < 1024**2
+
+    mirror = tmp_path / "mirror.git"
+    clone_sparse(url, tmp_path / "clone2", "docs", mirror_dir=mirror)
+    assert (mirror / "HEAD").exists()
+    stats = clone_sparse(url, tmp_path / "clone3", "docs", mirror_dir=mirror)
+    assert (tmp_path / "clone3" / "docs" / "changelog.md").read_text() == CHANGELOG
+    assert stats["mirror_bytes"] == 0
+
+
+def _remote_changelog(tmp_path, content):
+    # local bare repo standing in for lamin-docs on GitHub
+    work = tmp_path / "work"
+    (work / "docs").mkdir(parents=True)
+    (work / "docs" / "changelog.md").write_text(content)
+    _git("init", "-q", "-b", "main", cwd=work)
+    _git("add", ".", cwd=work)
+    _git("-c", "user.name=x", "-c", "user.email=x@x", "commit", "-qm", "init", cwd=work)
+    remote = tmp_path / "lamin-docs.git"
+    _git("clone", "-q", "--bare", str(work), str(remote))
+    _git("config", "uploadpack.allowFilter", "true", cwd=remote)
+    return remote
+
+
+def _github_pr(number: int, title: str, label: str, merged_at: int, base: str = "main"):
+    from datetime import UTC, datetime
+    from types import SimpleNamespace
+
+    pr = _pr(number, title)
+    merged_at_ = datetime.fromtimestamp(merged_at, tz=UTC)
+    return SimpleNamespace(
+        number=number,
+        title=title,
+        html_url=pr.html_url,
+        user=pr.user,
+        labels=[SimpleNamespace(name=label)],
+        merged=True,
+        merged_at=merged_at_,
+        updated_at=merged_at_,
+        base=SimpleNamespace(ref=base),
+    )
+
+
+@pytest.fixture
+def doc_changes_env(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    import laminci._doc_changes as module
+
+    prs = {
+        1: _github_pr(1, "Add a feature", "feature", 100),
+        2: _github_pr(2, "Fix a bug", "bug", 200),
+        3: _github_pr(3, "Another feature", "feature", 300),
+        # merged into a release branch, not part of the changelog
+        4: _github_pr(4, "Backport a fix", "bug", 250, base="release"),
+    }
+
+    def get_pulls(base=None, **kwargs):
+        pulls = [pr for pr in prs.values() if base is None or pr.base.ref == base]
+        return sorted(pulls, key=lambda pr: pr.updated_at, reverse=True)
+
+    repo = SimpleNamespace(
+        full_name="laminlabs/lamindb",
+        default_branch="main",
+        get_pull=prs.__getitem__,
+        get_pulls=get_pulls,
+    )
+    monkeypatch.setattr(
+        module, "Github", lambda token: SimpleNamespace(get_repo=lambda name: repo)
+    )
+    remote = _remote_changelog(tmp_path, CHANGELOG)
+    (tmp_path / "event.json").write_text('{"number": 2}')
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv("GITHUB_OUTPUT", raising=False)
+    monkeypatch.setenv("GITHUB_REPOSITORY", "laminlabs/lamindb")
+    monkeypatch.setenv("GITHUB_EVENT_PATH", str(tmp_path / "event.json"))
+    monkeypatch.setenv("REPO_TOKEN", "token")
+    monkeypatch.setenv("CHANGELOG_FILE", "lamin-docs/docs/changelog.md")
+    monkeypatch.setenv("DOCS_REPO_URL", f"file://{remote}")
+    monkeypatch.setattr(module.time, "sleep", lambda seconds: None)
+    return remote
+
+
+def _read_remote_changelog(remote) -> str:
+    return subprocess.run(
+        ["git", "show", "main:docs/changelog.md"],
+        check=True,
+        cwd=remote,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def test_doc_changes_since_last_entry(doc_changes_env):
+    from laminci._doc_changes import doc_changes
+
+    doc_changes(since_last_entry=True)
+    # PR 1 is already in the changelog, 2 and 3 were merged after it
+    assert _read_remote_changelog(doc_changes_env) == EXPECTED
+
+
+@pytest.mark.parametrize("concurrent_number", [3, 2])
+def test_doc_changes_retries_rejected_push(
+    doc_changes_env, tmp_path, monkeypatch, concurrent_number
+):
+    import laminci._doc_changes as module
+
+    clone_sparse_ = module.clone_sparse
+
+    def clone_sparse_and_push_concurrently(*args, **kwargs):
+        stats = clone_sparse_(*args, **kwargs)
+        # another job pushes right after our clone, so our first push is rejected
+        other = tmp_path / "other"
+        _git("clone", "-q", f"file://{doc_changes_env}", str(other))
+        pr = _pr(concurrent_number, "Another feature")
+        changelog = other / "docs" / "changelog.md"
+        changelog.write_text(
+            generate_content(
+                content=changelog.read_text(),
+                settings=module.Settings(),
+                pr=pr,
+                labels=["feature"],
+            )
+        )
+        _git(
+            "-c",
+            "user.name=x",
+            "-c",
+            "user.email=x@x",
+            "commit",
+            "-qam",
+            "concurrent",
+            cwd=other,
+        )
+        _git("push", "-q", cwd=other)
+        return stats
+
+    monkeypatch.setattr(module, "clone_sparse", clone_sparse_and_push_concurrently)
+    module.doc_changes()
+    content = _read_remote_changelog(doc_changes_env)
+    assert content.count("/pull/2)") == 1
+    if concurrent_number == 3:
+        # our entry was re-applied on top of the concurrent one
+        assert content.count("/pull/3)") == 1
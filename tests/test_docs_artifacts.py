@@ -0,0 +1,62 @@
+import zipfile
+
+from laminci._docs_artifacts import zip_docs_dir
+
+
+def test_zip_docs_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "README.md").write_text("# readme")
+    docs = tmp_path / "docs"
+    (docs / "sub" / ".ipynb_checkpoints").mkdir(parents=True)
+    (docs / "index.md").write_text("# index\n" * 100)
+    (docs / "nb.md").write_text("duplicate of nb.ipynb")
+    (docs / "nb.ipynb").write_text("{}")
+    (docs / "sub" / "image.png").write_bytes(b"\x89PNG" + bytes(range(256)))
+    (docs / "sub" / ".ipynb_checkpoints" / "nb-checkpoint.ipynb").write_text("{}")
+    (docs / "sub" / "data.csv").write_text("a,b")
+    zip_docs_dir("docs.zip", "docs")
+    with zipfile.ZipFile("docs.zip") as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["README.md", "index.md", "nb.ipynb", "sub/image.png"]
+        assert zf.getinfo("index.md").compress_type == zipfile.ZIP_DEFLATED
+        assert zf.getinfo("sub/image.png").compress_type == zipfile.ZIP_STORED
+        assert zf.read("index.md") == (docs / "index.md").read_bytes()
+
+
+def test_convert_executable_md_files_up_to_date(tmp_path, monkeypatch, capsys):
+    import json
+
+    from laminci._docs_artifacts import convert_executable_md_files
+
+    repo = tmp_path / "myrepo"
+    (repo / ".git").mkdir(parents=True)
+    (repo / "docs").mkdir()
+    monkeypatch.chdir(repo)
+    sources = {
+        stem: f"---\nexecute_via: python\n---\n\n# {stem}\n\n```python\nprint(1)\n```\n"
+        for stem in ["fresh", "stale"]
+    }
+
+    def write_sources():
+        for stem, source in sources.items():
+            (repo / "docs" / f"{stem}.md").write_text(source)
+
+    write_sources()
+    convert_executable_md_files("docs", workers=2)
+    assert "Converted 2 executable markdown files" in capsys.readouterr().out
+    assert not list((repo / "docs").glob("*.md"))
+    # mark the notebooks to see which get regenerated
+    for stem in sources:
+        path = repo / "docs" / f"{stem}.ipynb"
+        notebook = json.loads(path.read_text())
+        notebook["metadata"]["marker"] = True
+        path.write_text(json.dumps(notebook))
+    sources["stale"] = sources["stale"].replace("print(1)", "print(2)")
+    write_sources()
+    convert_executable_md_files("docs", workers=2)
+    assert "Converted 1 executable markdown files" in capsys.readouterr().out
+    fresh = json.loads((repo / "docs" / "fresh.ipynb").read_text())
+    stale = json.loads((repo / "docs" / "stale.ipynb").read_text())
+    assert fresh["metadata"]["marker"]
+    assert "marker" not in stale["metadata"]
+    assert "print(2)" in "".join(stale["cells"][-1]["source"])
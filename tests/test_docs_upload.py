@@ -0,0 +1,64 @@
+import io
+import os
+import zipfile
+
+import boto3
+import pytest
+from laminci._docs_upload import BUCKET, upload_docs_full, upload_docs_incremental
+from moto import mock_aws
+
+
+def _read_artifact(client):
+    body = client.get_object(Bucket=BUCKET, Key="docs/repo.zip")["Body"].read()
+    with zipfile.ZipFile(io.BytesIO(body)) as zf:
+        assert zf.testzip() is None
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        client = boto3.client("s3")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+def test_upload_docs_full(client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "README.md").write_text("# readme")
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("# a")
+    (docs / "b.png").write_bytes(os.urandom(12 * 1024**2))
+    stats = upload_docs_full(client, "repo", docs, chunk_size=5 * 1024**2)
+    artifact = _read_artifact(client)
+    assert list(artifact) == ["README.md", "a.md", "b.png"]
+    assert stats["bytes"] > 12 * 1024**2
+
+
+def test_upload_docs_incremental(client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "README.md").write_text("# readme")
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("# a")
+    (docs / "b.png").write_bytes(os.urandom(6 * 1024**2))
+    (docs / "c.png").write_bytes(os.urandom(6 * 1024**2))
+    (docs / "d.md").write_text("# d")
+
+    stats = upload_docs_incremental(client, "repo", docs)
+    assert stats["changed"] == 5 and stats["copied"] == 0
+    (docs / "a.md").write_text("# a changed")
+    (docs / "d.md").write_text("# d changed")
+    stats = upload_docs_incremental(client, "repo", docs)
+    assert stats["changed"] == 2
+    assert stats["copied"] > 6 * 1024**2
+    assert stats["uploaded"] < 6 * 1024**2
+    artifact = _read_artifact(client)
+    assert artifact["a.md"] == b"# a changed"
+    assert artifact["d.md"] == b"# d changed"
+    assert artifact["c.png"] == (docs / "c.png").read_bytes()
+    assert list(artifact) == ["README.md", "a.md", "b.png", "c.png", "d.md"]
+    stats = upload_docs_incremental(client, "repo", docs)
+    assert stats["changed"] == 0 and stats["uploaded"] == 0
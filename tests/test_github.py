@@ -0,0 +1,99 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from laminci._github import GitHubClient, GitHubError
+
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    requests: list = []
+    releases: list = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, data: bytes, headers: dict | None = None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _attempts(self, tag: str) -> int:
+        return sum(payload["tag_name"] == tag for *_, payload in self.requests)
+
+    def do_GET(self):
+        self._send(200, json.dumps(self.releases).encode())
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append((self.path, self.headers["Authorization"], payload))
+        tag = payload["tag_name"]
+        if tag == "0.2.0":
+            if any(release["tag_name"] == tag for release in self.releases):
+                status, headers = 422, {}
+                body = {
+                    "message": "Validation Failed",
+                    "errors": [{"resource": "Release", "code": "already_exists"}],
+                }
+            else:
+                # the release is created but the response is lost in a proxy
+                self.releases.append({"tag_name": tag, "html_url": "release/2"})
+                return self._send(502, b"<html>Bad Gateway</html>")
+        elif tag == "0.0.0":
+            status, headers = 422, {}
+            body = {"message": "Validation Failed"}
+        elif tag == "0.1.0" and self._attempts(tag) == 1:
+            status, headers = 403, {"retry-after": "0"}
+            body = {"message": "You have exceeded a secondary rate limit."}
+        else:
+            status, headers = 201, {}
+            body = {"html_url": f"https://github.com{self.path}/1"}
+        self._send(status, json.dumps(body).encode(), headers)
+
+
+@pytest.fixture
+def api_url():
+    FakeGitHub.requests = []
+    FakeGitHub.releases = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGitHub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_create_release(api_url):
+    client = GitHubClient(token="token", api_url=api_url)  # noqa: S106
+    release = client.create_release(
+        "laminlabs/laminci", tag="0.1.0", name="Release 0.1.0"
+    )
+    assert release["html_url"].endswith("/repos/laminlabs/laminci/releases/1")
+    # the secondary rate limit was retried
+    assert len(FakeGitHub.requests) == 2
+    path, authorization, payload = FakeGitHub.requests[-1]
+    assert path == "/repos/laminlabs/laminci/releases"
+    assert authorization == "Bearer token"
+    assert payload["tag_name"] == "0.1.0"
+    with pytest.raises(GitHubError, match="422"):
+        client.create_release("laminlabs/laminci", tag="0.0.0", name="Release")
+    assert len(FakeGitHub.requests) == 3
+
+
+def test_create_release_after_server_error(api_url):
+    client = GitHubClient(token="token", api_url=api_url)  # noqa: S106
+    # POSTs aren't retried on server errors by default, non-JSON bodies are fine
+    with pytest.raises(GitHubError, match="502"):
+        client.request(
+            "POST", "/repos/laminlabs/laminci/releases", {"tag_name": "0.2.0"}
+        )
+    FakeGitHub.releases.clear()
+    n_requests = len(FakeGitHub.requests)
+    release = client.create_release("laminlabs/laminci", tag="0.2.0", name="0.2.0")
+    assert release["html_url"] == "release/2"
+    assert len(FakeGitHub.requests) == n_requests + 2
+    # without a preceding server error, an existing release is an error
+    with pytest.raises(GitHubError, match="422"):
+        client.create_release("laminlabs/laminci", tag="0.2.0", name="0.2.0")
@@ -0,0 +1,44 @@
+import subprocess
+import sys
+
+# only imported by the commands that need them
+HEAVY_MODULES = {"nox", "yaml", "tomlkit", "boto3", "lamin_utils", "packaging"}
+# cumulative import time of the CLI module, generous to not be flaky
+BUDGET_US = 300_000
+
+
+def _import_times(module: str) -> dict[str, int]:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_time():
+    times = _import_times("laminci.__main__")
+    assert not HEAVY_MODULES & set(times)
+    assert times["laminci.__main__"] < BUDGET_US
+
+
+def test_package_import_is_lazy():
+    times = _import_times("laminci")
+    assert not HEAVY_MODULES & set(times)
+
+
+def test_nox_settings_applied_in_noxfiles():
+    # nox is imported before it loads a noxfile, the noxfile may only import laminci
+    code = (
+        "import nox, laminci; "
+        "print(nox.options.default_venv_backend, nox.session.__module__)"
+    )
+    stdout = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    assert stdout.split() == ["none", "laminci._nox_logger"]
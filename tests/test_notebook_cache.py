@@ -0,0 +1,53 @@
+import json
+
+from laminci._notebook_cache import NotebookCache
+
+
+def _write_notebook(path, *sources):
+    cells = [
+        {"cell_type": "code", "source": source, "metadata": {}, "outputs": []}
+        for source in sources
+    ]
+    nb = {"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+    path.write_text(json.dumps(nb))
+
+
+def test_notebook_cache(tmp_path):
+    (tmp_path / "toy").mkdir()
+    (tmp_path / "toy" / "__init__.py").write_text("from .core import one\n")
+    (tmp_path / "toy" / "core.py").write_text("def one():\n    return 1\n")
+    (tmp_path / "toy" / "unused.py").write_text("")
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    notebook = tmp_path / "nb.ipynb"
+    _write_notebook(notebook, "%load_ext autoreload\nimport toy", "toy.one()")
+
+    def key():
+        # a new cache per run, like run_notebooks
+        return NotebookCache(cache_dir, "toy", root=tmp_path).key(notebook)
+
+    cache = NotebookCache(cache_dir, "toy", root=tmp_path)
+    key_ = key()
+    assert not cache.restore(notebook, key_)
+    executed = notebook.read_text().replace('"outputs": []', '"outputs": [1]')
+    notebook.write_text(executed)
+    # outputs aren't part of the key
+    assert key() == key_
+    cache.store(notebook, key_)
+    _write_notebook(notebook, "%load_ext autoreload\nimport toy", "toy.one()")
+    assert cache.restore(notebook, key_)
+    assert notebook.read_text() == executed
+
+    # modules that the notebook doesn't import don't matter
+    (tmp_path / "toy" / "unused.py").write_text("x = 1\n")
+    assert key() == key_
+    # a change of a transitively imported module is a miss
+    (tmp_path / "toy" / "core.py").write_text("def one():\n    return 2\n")
+    assert key() != key_
+    assert not cache.restore(notebook, key())
+    (tmp_path / "toy" / "core.py").write_text("def one():\n    return 1\n")
+    assert key() == key_
+    # so is a change of the source
+    _write_notebook(notebook, "%load_ext autoreload\nimport toy", "toy.one() + 1")
+    assert key() != key_
+    assert not cache.restore(notebook, key())
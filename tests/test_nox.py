@@ -0,0 +1,212 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from laminci import nox as laminci_nox
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+
+
+class FakeSession:
+    """Records commands instead of running them, `uv build` writes a wheel."""
+
+    def __init__(self):
+        self.calls = []
+
+    def run(self, *args, **kwargs):
+        self.calls.append(args)
+        if args[:2] == ("git", "ls-remote"):
+            return f"{SHA}\trefs/heads/main\n"
+        if args[:2] == ("uv", "build"):
+            out_dir = args[args.index("--out-dir") + 1]
+            name = args[-1].rstrip("/").split("/")[-1]
+            wheel = f"{out_dir}/{name.replace('-', '_')}-1.0-py3-none-any.whl"
+            Path(out_dir).mkdir(parents=True, exist_ok=True)
+            Path(wheel).touch()
+        return ""
+
+    def commands(self, *prefix):
+        return [call for call in self.calls if call[: len(prefix)] == prefix]
+
+
+@pytest.fixture
+def session(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        laminci_nox,
+        "_warm_lamindb_resolution",
+        lambda target_dir, extras_str: nullcontext(SimpleNamespace(wait=lambda: 0)),
+    )
+    return FakeSession()
+
+
+def test_install_lamindb_cached(session, tmp_path, monkeypatch):
+    monkeypatch.setenv("LAMINCI_CACHE_DIR", str(tmp_path / "cache"))
+    laminci_nox.install_lamindb(session, "main", extras="bionty")
+    assert session.commands("git", "clone", "--bare")
+    assert len(session.commands("git", "-C", "lamindb", "submodule")) == 1
+    # lamindb and its submodules are built once
+    assert len(session.commands("uv", "build")) == 5
+    (install,) = [
+        call for call in session.commands("uv", "pip") if "--no-deps" not in call
+    ]
+    assert install[-1].startswith("lamindb[bionty] @ file://")
+    assert install[-1].endswith(f"/builds/{SHA}/package/lamindb-1.0-py3-none-any.whl")
+
+    session = FakeSession()
+    laminci_nox.install_lamindb(session, "main", target_dir="lamindb2")
+    assert not session.commands("git", "-C", "lamindb2", "submodule")
+    assert not session.commands("uv", "build")
+    assert len(session.commands("uv", "pip", "install")) == 2
+    stats_file = tmp_path / "cache" / "lamindb-install" / "stats.json"
+    assert json.loads(stats_file.read_text()) == {"hits": 1, "misses": 1}
+
+
+def test_install_lamindb_uncached(session, monkeypatch):
+    monkeypatch.delenv("LAMINCI_CACHE_DIR", raising=False)
+    laminci_nox.install_lamindb(session, "main")
+    assert session.commands("git", "clone", "-b", "main", "--depth", "1")
+    assert session.commands("git", "-C", "lamindb", "submodule")
+    assert not session.commands("uv", "build")
+    *_, install = session.commands("uv", "pip", "install")
+    assert install[-1] == "./lamindb[full]"
+
+
+def test_warm_lamindb_resolution_is_killed(monkeypatch):
+    popen = subprocess.Popen
+    monkeypatch.setattr(
+        laminci_nox.subprocess,
+        "Popen",
+        lambda args, **kwargs: popen(["sleep", "60"], **kwargs),
+    )
+    with pytest.raises(RuntimeError):
+        with laminci_nox._warm_lamindb_resolution("lamindb", "[full]") as warmup:
+            raise RuntimeError("submodule update failed")
+    assert warmup.returncode is not None
+
+
+def test_build_lamindb_wheels_concurrently(tmp_path):
+    lock = threading.Lock()
+    running = []
+    max_running = []
+
+    class SlowSession(FakeSession):
+        def run(self, *args, **kwargs):
+            with lock:
+                running.append(args)
+                max_running.append(len(running))
+            time.sleep(0.1)
+            super().run(*args, **kwargs)
+            with lock:
+                running.remove(args)
+
+    laminci_nox._build_lamindb_wheels(SlowSession(), "main", "lamindb", tmp_path)
+    assert len(list(tmp_path.glob("sub/*.whl"))) == len(laminci_nox.LAMINDB_SUBMODULES)
+    assert len(list(tmp_path.glob("package/*.whl"))) == 1
+    assert max(max_running) > 1
+    # the release branch has no submodules to build
+    laminci_nox._build_lamindb_wheels(
+        FakeSession(), "release", "lamindb", tmp_path / "r"
+    )
+    assert not (tmp_path / "r" / "sub").exists()
+
+
+class SubprocessSession:
+    """Runs commands like a nox session without a virtualenv."""
+
+    def run(self, *args, env=None, success_codes=None, **kwargs):
+        result = subprocess.run(args, env={**os.environ, **(env or {})})
+        if result.returncode not in (success_codes or [0]):
+            raise RuntimeError(f"{args} failed with {result.returncode}")
+
+    def log(self, message):
+        pass
+
+    def error(self, message):
+        raise RuntimeError(message)
+
+
+def test_run_pytest_workers(tmp_path, monkeypatch):
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "toy"\n')
+    (tmp_path / "toy").mkdir()
+    (tmp_path / "toy" / "__init__.py").write_text("def one():\n    return 1\n")
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_toy.py").write_text(
+        "import os\n\nfrom toy import one\n\n\n"
+        "def test_a():\n    assert os.environ['LAMINCI_TEST_WORKER']\n\n\n"
+        "def test_b():\n    assert one() == 1\n"
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("LAMINCI_CACHE_DIR", raising=False)
+    monkeypatch.delenv("GITHUB_EVENT_NAME", raising=False)
+    repo_root = Path(laminci_nox.__file__).parents[1]
+    env = {"PYTHONPATH": f"{tmp_path}{os.pathsep}{repo_root}"}
+    popen = subprocess.Popen
+    commands = []
+
+    def popen_crashing_last_worker(command, **kwargs):
+        worker = (kwargs.get("env") or {}).get("LAMINCI_TEST_WORKER")
+        if worker is not None:
+            commands.append(command)
+        if worker == "gw2":
+            # dies before writing coverage data or a report
+            command = [sys.executable, "-c", "raise SystemExit(5)"]
+        return popen(command, **kwargs)
+
+    monkeypatch.setattr(laminci_nox.subprocess, "Popen", popen_crashing_last_worker)
+    history_file = tmp_path / "history.json"
+    laminci_nox.run_pytest(
+        SubprocessSession(), env=env, workers=3, history_file=history_file
+    )
+    assert (tmp_path / "coverage.xml").exists()
+    # workers get the same flags as a single pytest process
+    assert len(commands) == 3
+    assert all(command[:2] == ["pytest", "-s"] for command in commands)
+    tests = json.loads(history_file.read_text())["tests"]
+    assert set(tests) == {"tests/test_toy.py::test_a", "tests/test_toy.py::test_b"}
+    assert tests["tests/test_toy.py::test_b"]["files"] == ["toy/__init__.py"]
+
+
+def _git(*args, cwd):
+    subprocess.run(
+        ["git", "-c", "user.name=x", "-c", "user.email=x@x", *args],
+        check=True,
+        cwd=cwd,
+        capture_output=True,
+    )
+
+
+def test_changed_files(tmp_path, monkeypatch):
+    base = tmp_path / "base"
+    base.mkdir()
+    _git("init", "-q", "-b", "main", cwd=base)
+    (base / "a.py").write_text("a = 1\n")
+    _git("add", ".", cwd=base)
+    _git("commit", "-qm", "init", cwd=base)
+    _git("clone", "-q", str(base), "pr", cwd=tmp_path)
+    (tmp_path / "pr" / "b.py").write_text("b = 1\n")
+    _git("add", ".", cwd=tmp_path / "pr")
+    _git("commit", "-qm", "add b", cwd=tmp_path / "pr")
+    monkeypatch.chdir(tmp_path / "pr")
+    monkeypatch.delenv("GITHUB_EVENT_NAME", raising=False)
+    monkeypatch.setenv("GITHUB_BASE_REF", "main")
+    assert laminci_nox._changed_files() is None
+    monkeypatch.setenv("GITHUB_EVENT_NAME", "pull_request")
+    assert laminci_nox._changed_files() == ["b.py"]
+    # unrelated histories have no merge base, all tests run
+    unrelated = tmp_path / "unrelated"
+    unrelated.mkdir()
+    _git("init", "-q", "-b", "feature", cwd=unrelated)
+    (unrelated / "c.py").write_text("c = 1\n")
+    _git("add", ".", cwd=unrelated)
+    _git("commit", "-qm", "init", cwd=unrelated)
+    _git("remote", "add", "origin", str(base), cwd=unrelated)
+    monkeypatch.chdir(unrelated)
+    assert laminci_nox._changed_files() is None
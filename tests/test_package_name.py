@@ -1,5 +1,37 @@
+import pytest
 from laminci import get_package_name
 
 
 def test_get_package_name():
     assert get_package_name() == "laminci"
+
+
+def test_project_config(tmp_path):
+    from laminci._env import ProjectConfig
+
+    (tmp_path / "pyproject.toml").write_text('[project]\nname = "lnschema-core"\n')
+    (tmp_path / "lnschema_core").mkdir()
+    (tmp_path / "lnschema_core/__init__.py").write_text('__version__ = "0.1.0"\n')
+    config = ProjectConfig.load(tmp_path)
+    assert config.package_name == "lnschema_core"
+    assert config.schema_handle == "core"
+    assert config.version == "0.1.0"
+    assert ProjectConfig.load(tmp_path) is config
+    # lamin-project.yaml takes precedence and changes are picked up
+    (tmp_path / "lamin-project.yaml").write_text("project_slug: core\n")
+    config = ProjectConfig.load(tmp_path)
+    assert config.package_name is None
+    assert config.project_slug == "core"
+    (tmp_path / "lamin-project.yaml").write_text(
+        "project_slug: core\npackage_name: lnschema_core\n"
+    )
+    assert ProjectConfig.load(tmp_path).package_name == "lnschema_core"
+
+
+def test_get_project_slug(tmp_path):
+    from laminci._env import get_project_slug
+
+    with pytest.raises(ValueError, match="project slug"):
+        get_project_slug(tmp_path)
+    (tmp_path / "lamin-project.yaml").write_text("project_slug: core\n")
+    assert get_project_slug(tmp_path) == "core"
@@ -0,0 +1,60 @@
+import subprocess
+
+from laminci._release import (
+    get_last_version_from_tags,
+    read_repo_state,
+    release_commit_and_push,
+)
+
+
+def _git(*args, cwd=None):
+    return subprocess.run(
+        ["git", *args], check=True, cwd=cwd, capture_output=True, text=True
+    ).stdout
+
+
+def test_release_commit_and_push(tmp_path, monkeypatch):
+    for variable in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{variable}_NAME", "x")
+        monkeypatch.setenv(f"GIT_{variable}_EMAIL", "x@x")
+    remote = tmp_path / "remote.git"
+    _git("init", "-q", "--bare", "-b", "main", str(remote))
+    work = tmp_path / "work"
+    _git("clone", "-q", str(remote), str(work))
+    (work / "__init__.py").write_text('__version__ = "0.1.0"\n')
+    _git("add", ".", cwd=work)
+    _git("commit", "-qm", "init", cwd=work)
+    _git("push", "-q", "-u", "origin", "main", cwd=work)
+    for tag in ["0.1.0", "0.2a1", "0.2rc1", "not-a-version", "0.10.0a1"]:
+        _git("tag", tag, cwd=work)
+    assert get_last_version_from_tags(cwd=work) == "0.10.0a1"
+    _git("tag", "-d", "0.10.0a1", cwd=work)
+    assert get_last_version_from_tags(cwd=work) == "0.2rc1"
+    _git("tag", "0.2.0", cwd=work)
+    assert get_last_version_from_tags(cwd=work) == "0.2.0"
+
+    (work / "__init__.py").write_text('__version__ = "0.3.0"\n')
+    (work / "new file.txt").write_text("untracked")
+    _git("add", "-u", cwd=work)
+    state = read_repo_state(cwd=work)
+    assert state.branch == "main"
+    assert state.upstream == "origin/main"
+    assert state.staged == ["__init__.py"]
+    release_commit_and_push("0.3.0", state, cwd=work)
+    assert _git("log", "-1", "--format=%s", "main", cwd=remote) == "🔖 Release 0.3.0\n"
+    assert _git("rev-parse", "0.3.0^{commit}", cwd=remote) == _git(
+        "rev-parse", "main", cwd=remote
+    )
+
+
+def test_twine_env_keeps_flit_credentials(monkeypatch):
+    from laminci.__main__ import _twine_env
+
+    monkeypatch.setenv("FLIT_USERNAME", "__token__")
+    monkeypatch.setenv("FLIT_PASSWORD", "pypi-token")
+    monkeypatch.delenv("TWINE_USERNAME", raising=False)
+    monkeypatch.setenv("TWINE_PASSWORD", "twine-token")
+    env = _twine_env()
+    assert env["TWINE_USERNAME"] == "__token__"
+    # explicit twine settings win
+    assert env["TWINE_PASSWORD"] == "twine-token"  # noqa: S105
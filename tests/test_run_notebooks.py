@@ -0,0 +1,135 @@
+import json
+import os
+from pathlib import Path
+
+import nbproject_test
+import pytest
+from laminci._run_notebooks import (
+    _collect_notebooks,
+    _execute_chain,
+    _schedule,
+    run_notebooks,
+)
+
+NOTEBOOK = {"cells": [], "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    for stem in ["setup", "query", "plot-10", "plot-2", "transfer"]:
+        (folder / f"{stem}.ipynb").write_text(json.dumps(NOTEBOOK))
+    (folder / "index.md").write_text(
+        "# Guide\n\n```{toctree}\n:maxdepth: 1\n\nsetup\nquery\nfaq\n```\n"
+    )
+    return folder
+
+
+def test_collect_notebooks(folder):
+    # indexed notebooks first, then natsorted
+    assert [nb.stem for nb in _collect_notebooks(folder)] == [
+        "setup",
+        "query",
+        "plot-2",
+        "plot-10",
+        "transfer",
+    ]
+
+
+def test_schedule(folder):
+    notebooks = _collect_notebooks(folder)
+    # without declarations, all notebooks may depend on the ones before them
+    assert _schedule(notebooks, None) == [notebooks]
+    chains = _schedule(notebooks, [["setup", "query", "transfer"]])
+    assert [[nb.stem for nb in chain] for chain in chains] == [
+        ["setup", "query", "transfer"],
+        ["plot-2", "plot-10"],
+    ]
+    chains = _schedule(notebooks, [["setup", "query", "transfer"]], independent=True)
+    assert [[nb.stem for nb in chain] for chain in chains] == [
+        ["setup", "query", "transfer"],
+        ["plot-2"],
+        ["plot-10"],
+    ]
+    chains = _schedule(notebooks, None, independent=["plot-10"])
+    assert [[nb.stem for nb in chain] for chain in chains] == [
+        ["plot-10"],
+        ["setup", "query", "plot-2", "transfer"],
+    ]
+    with pytest.raises(ValueError, match="not found"):
+        _schedule(notebooks, [["missing"]])
+    with pytest.raises(ValueError, match="not found"):
+        _schedule(notebooks, None, independent=["missing"])
+    with pytest.raises(ValueError, match="several groups"):
+        _schedule(notebooks, [["setup"], ["setup", "query"]])
+
+
+@pytest.fixture
+def execute_failing_query(monkeypatch):
+    executed = []
+
+    def execute_notebooks(nb, write):
+        # like nbproject_test, change into the folder and don't change back
+        os.chdir(nb.parent)
+        executed.append(nb.stem)
+        if nb.stem == "query":
+            raise RuntimeError("cell failed")
+
+    monkeypatch.setattr(nbproject_test, "execute_notebooks", execute_notebooks)
+    return executed
+
+
+def test_execute_chain_reports_failures(folder, execute_failing_query):
+    cwd = Path.cwd()
+    chain = [folder / f"{stem}.ipynb" for stem in ["setup", "query", "transfer"]]
+    reports = _execute_chain(chain)
+    assert Path.cwd() == cwd
+    assert execute_failing_query == ["setup", "query"]
+    assert [(r.notebook, r.passed) for r in reports] == [
+        ("setup.ipynb", True),
+        ("query.ipynb", False),
+        ("transfer.ipynb", False),
+    ]
+    assert reports[1].error == "RuntimeError('cell failed')"
+    assert reports[2].error == "skipped: query.ipynb failed"
+
+
+def test_run_notebooks_failure_report(folder, tmp_path, execute_failing_query, capsys):
+    with pytest.raises(RuntimeError, match="query.ipynb, transfer.ipynb"):
+        run_notebooks(
+            folder,
+            sequential=[["setup", "query", "transfer"]],
+            cache_dir=tmp_path / "cache",
+        )
+    report = capsys.readouterr().out
+    assert "✓ setup.ipynb" in report
+    assert "✗ query.ipynb" in report
+    assert "3/5 passed" in report
+
+
+def test_run_notebooks_cache(folder, tmp_path, monkeypatch):
+    executed = []
+    monkeypatch.setattr(
+        nbproject_test,
+        "execute_notebooks",
+        lambda nb, write: executed.append(nb.stem),
+    )
+    cache_dir = tmp_path / "cache"
+    run_notebooks(folder, cache_dir=cache_dir)
+    assert executed == ["setup", "query", "plot-2", "plot-10", "transfer"]
+    executed.clear()
+    reports = run_notebooks(folder, cache_dir=cache_dir)
+    assert not executed
+    assert all(report.cached for report in reports)
+    # a changed notebook may depend on the state of the ones before it
+    cell = {"cell_type": "code", "source": "x = 1", "metadata": {}, "outputs": []}
+    transfer = {**NOTEBOOK, "cells": [cell]}
+    (folder / "transfer.ipynb").write_text(json.dumps(transfer))
+    run_notebooks(folder, cache_dir=cache_dir)
+    assert executed == ["setup", "query", "plot-2", "plot-10", "transfer"]
+    executed.clear()
+    cell["source"] = "x = 2"
+    (folder / "transfer.ipynb").write_text(json.dumps(transfer))
+    run_notebooks(folder, independent=["transfer"], cache_dir=cache_dir)
+    assert executed == ["transfer"]
@@ -0,0 +1,54 @@
+import json
+
+import boto3
+import pytest
+from laminci import _secrets
+from moto import mock_aws
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.delenv("LAMINCI_CACHE_DIR", raising=False)
+    monkeypatch.delenv("LAMINCI_SECRETS_KEY", raising=False)
+    monkeypatch.delenv("RUNNER_TEMP", raising=False)
+    with mock_aws():
+        _secrets.clear_secret_cache()
+        client = boto3.client("secretsmanager", region_name="us-east-1")
+        client.create_secret(Name="internal", SecretString=json.dumps({"KEY": "1"}))
+        yield client
+        _secrets.clear_secret_cache()
+
+
+def test_get_secret_cached_in_memory(client):
+    assert _secrets.get_secret("internal") == {"KEY": "1"}
+    client.put_secret_value(SecretId="internal", SecretString=json.dumps({"KEY": "2"}))
+    assert _secrets.get_secret("internal") == {"KEY": "1"}
+    assert _secrets.get_secret("internal", ttl=0) == {"KEY": "2"}
+
+
+def test_get_secret_cached_on_disk(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("LAMINCI_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("RUNNER_TEMP", str(tmp_path / "runner"))
+    (tmp_path / "runner").mkdir()
+    monkeypatch.setenv("LAMINCI_SECRETS_KEY", "job-key")
+    assert _secrets.get_secret("internal") == {"KEY": "1"}
+    # the persisted cache dir is restored across jobs, secrets stay out of it
+    assert not (tmp_path / "cache").exists()
+    (path,) = (tmp_path / "runner" / "laminci-secrets").iterdir()
+    assert b"KEY" not in path.read_bytes()
+    # a fresh process reads the secret from disk instead of fetching it
+    _secrets.clear_secret_cache()
+    client.put_secret_value(SecretId="internal", SecretString=json.dumps({"KEY": "2"}))
+    assert _secrets.get_secret("internal") == {"KEY": "1"}
+    # the cache can't be read with another key
+    _secrets.clear_secret_cache()
+    monkeypatch.setenv("LAMINCI_SECRETS_KEY", "other-key")
+    assert _secrets.get_secret("internal") == {"KEY": "2"}
+
+
+def test_get_secret_not_on_disk_outside_a_job(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("LAMINCI_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("LAMINCI_SECRETS_KEY", "job-key")
+    assert _secrets.get_secret("internal") == {"KEY": "1"}
+    assert not any(tmp_path.rglob("*"))
@@ -0,0 +1,51 @@
+from laminci._test_history import TestHistory, balance_shards
+
+
+def test_balance_shards():
+    durations = {"a": 10.0, "b": 6.0, "c": 5.0, "d": 1.0}
+    shards = balance_shards(["d", "c", "b", "a", "new"], durations, 2)
+    # the unknown test counts with the median duration
+    assert shards == [["a", "c"], ["b", "new", "d"]]
+    assert sorted(sum(balance_shards(list("abcdefg"), {}, 3), [])) == list("abcdefg")
+
+
+def test_history_update(tmp_path):
+    history = TestHistory(tmp_path / "history.json")
+    history.update({"t": {"duration": 2.0, "outcome": "failed"}})
+    history.save()
+    history = TestHistory(tmp_path / "history.json")
+    history.update({"t": {"duration": 4.0, "outcome": "passed"}})
+    assert history.tests == {"t": {"duration": 3.0, "outcome": "passed"}}
+
+
+def test_history_selection_and_order():
+    history = TestHistory(None)
+    history.update(
+        {
+            "tests/test_a.py::test_1": {"duration": 1.0, "outcome": "passed"},
+            "tests/test_b.py::test_1": {"duration": 5.0, "outcome": "passed"},
+            "tests/test_c.py::test_1": {"duration": 0.1, "outcome": "failed"},
+        }
+    )
+    coverage_json = {
+        "files": {
+            "pkg/a.py": {"contexts": {"1": ["", "tests/test_a.py::test_1|run"]}},
+            "pkg/b.py": {"contexts": {"3": ["tests/test_b.py::test_1|setup"]}},
+        }
+    }
+    history.update_files(coverage_json, list(history.tests))
+    nodeids = [*history.tests, "tests/test_d.py::test_new"]
+    # failed and new tests always run
+    assert history.affected(nodeids, ["pkg/a.py"]) == {
+        "tests/test_a.py::test_1",
+        "tests/test_c.py::test_1",
+        "tests/test_d.py::test_new",
+    }
+    assert "tests/test_b.py::test_1" in history.affected(nodeids, ["tests/test_b.py"])
+    assert history.affected(nodeids, ["pyproject.toml"]) is None
+    assert history.order(nodeids) == [
+        "tests/test_c.py::test_1",
+        "tests/test_b.py::test_1",
+        "tests/test_a.py::test_1",
+        "tests/test_d.py::test_new",
+    ]
@@ -0,0 +1,56 @@
+import zipfile
+
+from laminci._wheels import inspect_wheel, inspect_wheels, wheel_filename
+
+
+def _write_wheel(path, files, requires=(), record_sizes=None):
+    dist_info = "lamindb-1.0.dist-info"
+    metadata = "Metadata-Version: 2.1\nName: lamindb\nVersion: 1.0\n"
+    metadata += "".join(f"Requires-Dist: {requirement}\n" for requirement in requires)
+    files = {**files, f"{dist_info}/METADATA": metadata}
+    sizes = {name: len(content.encode()) for name, content in files.items()}
+    sizes.update(record_sizes or {})
+    record = "".join(f"{name},sha256=x,{size}\n" for name, size in sizes.items())
+    record += f"{dist_info}/RECORD,,\n"
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+        zf.writestr(f"{dist_info}/RECORD", record)
+    return path
+
+
+def test_wheel_filename():
+    assert wheel_filename("lamindb-core", "1.2.0rc1") == (
+        "lamindb_core-1.2.0rc1-py3-none-any.whl"
+    )
+
+
+def test_inspect_wheel(tmp_path):
+    full = _write_wheel(
+        tmp_path / "full.whl",
+        {"lamindb_full/__init__.py": ""},
+        requires=['lamindb-core[full,aws]==1.0; python_version >= "3.10"'],
+    )
+    assert inspect_wheel(full, requirements=["lamindb_core[full]==1.0"]) == []
+    problems = inspect_wheel(
+        full,
+        packages=["lamindb"],
+        requirements=["lamindb-core[full]==1.1"],
+        max_bytes=10,
+    )
+    # checks on the central directory return early
+    assert len(problems) == 2
+    assert "does not contain lamindb/" in problems[1]
+    core = _write_wheel(
+        tmp_path / "core.whl",
+        {"lamindb/__init__.py": "x = 1\n"},
+        record_sizes={"lamindb/__init__.py": 3, "lamindb/missing.py": 1},
+    )
+    problems = inspect_wheels(
+        {core: {"packages": ["lamindb"]}, full: {"forbidden_packages": ["lamindb"]}}
+    )
+    assert problems[full] == []
+    assert problems[core] == [
+        "core.whl: lamindb/__init__.py has size 6, RECORD lists 3",
+        "core.whl: lamindb/missing.py is listed in RECORD but missing",
+    ]
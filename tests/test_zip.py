@@ -0,0 +1,30 @@
+import io
+import os
+import zipfile
+
+import pytest
+from laminci import _zip
+from laminci._zip import ZipStreamWriter, compress_file
+
+
+def test_zip_limits(tmp_path, monkeypatch):
+    # already compressed formats are stored, so sizes are predictable
+    (tmp_path / "a.png").write_bytes(os.urandom(100))
+    entry, data = compress_file(tmp_path / "a.png", "a.png")
+    monkeypatch.setattr(_zip, "_MAX_ENTRIES", 2)
+    buffer = io.BytesIO()
+    writer = ZipStreamWriter(buffer)
+    writer.write(entry, data)
+    writer.write(entry, data)
+    with pytest.raises(ValueError, match="more than 2 members"):
+        writer.write(entry, data)
+    writer.close()
+    with zipfile.ZipFile(buffer) as zf:
+        assert zf.testzip() is None
+    # the offset of the end of a member is checked before anything is written
+    monkeypatch.setattr(_zip, "_MAX_32", 2 * len(data))
+    writer = ZipStreamWriter(io.BytesIO())
+    writer.write(entry, data)
+    with pytest.raises(ValueError, match="exceeds 4 GiB"):
+        writer.record(entry, 2 * len(data))
+    assert len(writer.entries) == 1